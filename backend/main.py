@@ -1,13 +1,27 @@
-from fastapi import FastAPI, UploadFile, File
+from fastapi import FastAPI, UploadFile, File, Form
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-import pandas as pd
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+import io
+import itertools
+import json
+from typing import List
 from pydantic import BaseModel
 
-# ML logic imports
-from services.predict import predict_chlorophyll
-from services.sst_predict import forecast_sst_from_csv
-# fish_classifier imports moved to lazy loading (only when endpoint is called)
-# This speeds up server reload significantly
+from services.executors import run_cpu, run_llm, get_executor_stats
+from services.registry import registry
+
+# Heavy subsystems are imported on first use (or by the startup warmup)
+# so the server starts accepting requests immediately
+pd = registry.register("pandas", "pandas")
+chlorophyll = registry.register("chlorophyll", "services.predict")
+sst = registry.register("sst", "services.sst_predict")
+heatwaves = registry.register("heatwaves", "services.sst_anomaly")
+registry.register("prophet", "prophet")
+agents = registry.register("agents", "Agents.orchestrator")
+edna = registry.register("edna", "services.edna_analyzer")
+registry.register("fish_classifier", "services.fish_classifier", init="load_model_and_labels")
+registry.register("aws_agents", "aws.agents")
 
 # -----------------------------
 # App Initialization
@@ -27,19 +41,45 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Grid-Header"],  # JSON header for binary grid payloads
 )
 
 # -----------------------------
 # Startup Event
 # -----------------------------
-# Commented out to prevent server hanging on startup
-# The fish classifier model will load lazily on first use
-# @app.on_event("startup")
-# async def startup_event():
-#     """Load ML models at application startup"""
-#     print("🚀 Loading ML models...")
-#     load_model_and_labels()
-#     print("✅ All models loaded successfully!")
+# Models load in a background thread so startup never blocks; the fish
+# classifier is left out of the default WARMUP_SUBSYSTEMS and loads on first use
+@app.on_event("startup")
+async def startup_event():
+    """Start background warmup of heavy subsystems"""
+    print("🚀 Warming up subsystems in the background...")
+    registry.warmup()
+
+
+# -----------------------------
+# Health Checks
+# -----------------------------
+@app.get("/api/health/live")
+def health_live():
+    """Liveness: the process is up and serving requests"""
+    return {"status": "alive"}
+
+
+@app.get("/api/health/ready")
+def health_ready():
+    """
+    Readiness: every warmup subsystem has loaded.
+    Returns 503 until then, with per-subsystem load state and load time.
+    """
+    ready = registry.is_ready()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "status": "ready" if ready else "not_ready",
+            "warmup": registry.warmup_targets,
+            "subsystems": registry.status(),
+        },
+    )
 
 # -----------------------------
 # Input Models
@@ -49,14 +89,39 @@ class ChlorophyllInput(BaseModel):
     salinity: float
     ph: float
 
+class GridAxis(BaseModel):
+    start: float
+    stop: float
+    step: float
+
+class ChlorophyllGridInput(BaseModel):
+    depth: GridAxis
+    salinity: GridAxis
+    ph: GridAxis
+
 # -----------------------------
 # Routes
 # -----------------------------
 
 # 1️⃣ Chlorophyll Prediction – Single Input
 @app.post("/api/predict")
-def predict_single(data: ChlorophyllInput):
-    prediction = predict_chlorophyll(
+async def predict_single(data: ChlorophyllInput, uncertainty: bool = False):
+    """
+    With ?uncertainty=true the response also carries the standard deviation
+    and percentile interval across the forest's individual trees.
+    """
+    predictor = await registry.aget("chlorophyll")
+
+    if uncertainty:
+        stats = await run_cpu(predictor.predict_chlorophyll_uncertainty, [[data.depth, data.salinity, data.ph]])
+        values = {name: float(v[0]) for name, v in stats.items()}
+        return {
+            "predicted_chlorophyll": values.pop("mean"),
+            "uncertainty": values
+        }
+
+    # Concurrent requests are coalesced into one batched model call
+    prediction = await predictor.predict_chlorophyll_async(
         data.depth,
         data.salinity,
         data.ph
@@ -66,15 +131,45 @@ def predict_single(data: ChlorophyllInput):
     }
 
 
+@app.get("/api/predict/stats")
+def predict_stats():
+    """
+    Monitoring counters for chlorophyll predictions
+    (cache hits/misses/evictions, micro-batch sizes).
+    """
+    return chlorophyll.get_prediction_stats()
+
+
+@app.get("/api/executors/stats")
+def executor_stats():
+    """In-flight / queued / completed counters of the cpu and llm worker pools"""
+    return get_executor_stats()
+
+
 # 2️⃣ Chlorophyll Prediction – CSV Upload
 @app.post("/api/predict/csv")
-async def predict_chlorophyll_csv(file: UploadFile = File(...)):
+async def predict_chlorophyll_csv(file: UploadFile = File(...), stream: bool = False,
+                                 uncertainty: bool = False):
     """
     CSV must contain columns:
     depth, salinity, ph
     Optional: chlorophyll (for comparison)
+
+    With ?stream=true the upload is read in fixed-size chunks and results
+    are streamed back as NDJSON (one JSON object per row).
+
+    With ?uncertainty=true, chlorophyll_std and chlorophyll_p<q> columns
+    (per-tree spread) are added.
     """
-    df = pd.read_csv(file.file)
+    if stream:
+        return await stream_chlorophyll_csv(file, uncertainty)
+
+    return await run_cpu(run_chlorophyll_csv, file.file, uncertainty)
+
+
+def run_chlorophyll_csv(csv_file, uncertainty: bool = False) -> dict:
+    """Blocking body of /api/predict/csv (runs on the cpu pool)"""
+    df = pd.read_csv(csv_file)
     df.columns = df.columns.str.lower().str.strip()
 
     required_cols = {"depth", "salinity", "ph"}
@@ -83,18 +178,24 @@ async def predict_chlorophyll_csv(file: UploadFile = File(...)):
             "error": f"CSV must contain columns: {required_cols}. Found: {list(df.columns)}"
         }
 
-    predictions = [
-        predict_chlorophyll(row["depth"], row["salinity"], row["ph"])
-        for _, row in df.iterrows()
-    ]
+    if uncertainty:
+        stats = chlorophyll.predict_chlorophyll_uncertainty(df)
+        predictions = stats.pop("mean")
+    else:
+        # One vectorized model call per chunk instead of one per row
+        predictions = chlorophyll.predict_chlorophyll_batch(df)
 
     response = {
         "depth": df["depth"].tolist(),
         "salinity": df["salinity"].tolist(),
         "ph": df["ph"].tolist(),
-        "predicted_chlorophyll": predictions
+        "predicted_chlorophyll": predictions.tolist()
     }
 
+    if uncertainty:
+        for name, values in stats.items():
+            response[f"chlorophyll_{name}"] = values.tolist()
+
     # Optional: compare with actual chlorophyll if provided
     if "chlorophyll" in df.columns:
         response["actual_chlorophyll"] = df["chlorophyll"].tolist()
@@ -102,9 +203,87 @@ async def predict_chlorophyll_csv(file: UploadFile = File(...)):
     return response
 
 
+def open_chlorophyll_stream(csv_file):
+    """
+    Chunked CSV reader plus its parsed first chunk (blocking; runs on the cpu pool).
+    Returns (None, None) for an empty upload.
+    """
+    try:
+        reader = pd.read_csv(csv_file, chunksize=chlorophyll.STREAM_CHUNK_ROWS)
+    except pd.errors.EmptyDataError:
+        return None, None
+    return reader, next(reader, None)
+
+
+async def stream_chlorophyll_csv(file: UploadFile, uncertainty: bool = False):
+    """
+    Streaming variant of /api/predict/csv.
+    Only one chunk of STREAM_CHUNK_ROWS rows is held in memory at a time.
+    """
+    predictor = await registry.aget("chlorophyll")
+    reader, first_chunk = await run_cpu(open_chlorophyll_stream, file.file)
+
+    # Validate columns on the first chunk before committing to a streamed response
+    if first_chunk is None:
+        return {"error": "CSV file is empty"}
+
+    first_chunk.columns = first_chunk.columns.str.lower().str.strip()
+    required_cols = {"depth", "salinity", "ph"}
+    if not required_cols.issubset(first_chunk.columns):
+        return {
+            "error": f"CSV must contain columns: {required_cols}. Found: {list(first_chunk.columns)}"
+        }
+
+    output_cols = ["depth", "salinity", "ph", "predicted_chlorophyll"]
+    if "chlorophyll" in first_chunk.columns:
+        output_cols.append("actual_chlorophyll")
+    if uncertainty:
+        output_cols.append("chlorophyll_std")
+        output_cols.extend(f"chlorophyll_p{q:g}" for q in predictor.UNCERTAINTY_PERCENTILES)
+
+    def generate_ndjson():
+        chunks = itertools.chain([first_chunk], reader)
+        for chunk in predictor.iter_chlorophyll_predictions(chunks, uncertainty=uncertainty):
+            chunk = chunk.rename(columns={"chlorophyll": "actual_chlorophyll"})
+            yield chunk[output_cols].to_json(orient="records", lines=True)
+
+    return StreamingResponse(generate_ndjson(), media_type="application/x-ndjson")
+
+
+# Chlorophyll Prediction – depth × salinity × pH grid
+@app.post("/api/predict/grid")
+def predict_chlorophyll_grid_endpoint(data: ChlorophyllGridInput):
+    """
+    Evaluate chlorophyll over a depth × salinity × pH grid (stop is inclusive).
+
+    Returns a float32 NPY payload of shape (n_depth, n_salinity, n_ph).
+    The JSON header (shape, axes, min/max) is sent in the X-Grid-Header
+    response header.
+    """
+    from services.chlorophyll_grid import predict_chlorophyll_grid
+
+    axes = {
+        name: (axis.start, axis.stop, axis.step)
+        for name, axis in (("depth", data.depth), ("salinity", data.salinity), ("ph", data.ph))
+    }
+
+    try:
+        header, payload = predict_chlorophyll_grid(axes)
+    except ValueError as e:
+        return {"error": str(e)}
+
+    return Response(
+        content=payload,
+        media_type="application/octet-stream",
+        headers={"X-Grid-Header": json.dumps(header)},
+    )
+
+
 # 3️⃣ SST Forecasting – CSV Upload (OPTION 2 ✅)
 @app.post("/api/predict/sst/csv")
-async def predict_sst_csv(file: UploadFile = File(...)):
+async def predict_sst_csv(file: UploadFile = File(...), stream: bool = False,
+                          warm_start: bool = False, station_id: str = None,
+                          engine: str = "prophet"):
     """
     SST CSV must contain columns:
     date,value
@@ -113,8 +292,93 @@ async def predict_sst_csv(file: UploadFile = File(...)):
     date,value
     1991-07-01,3.52
     1991-08-01,3.18
+
+    Optional: station_id – each station is forecast in parallel in a
+    process pool and results are returned per station. With ?stream=true
+    they are streamed as NDJSON, one station per line, as fits complete.
+
+    With ?warm_start=true each station's fit is seeded with its previously
+    fitted parameters (incremental update for appended observations).
+    Single-series uploads name their station with ?station_id=...
+
+    ?engine=harmonic selects the lightweight NumPy model (trend + annual
+    harmonics) for sub-100ms forecasts; Prophet remains the default.
+    """
+    # validate_sst_request reads sst.SST_ENGINES: import both modules off the loop first
+    pandas = await registry.aget("pandas")
+    sst_module = await registry.aget("sst")
+    df = await run_cpu(pandas.read_csv, file.file)
+    df.columns = df.columns.str.lower().str.strip()
+
+    error = validate_sst_request(df, engine, warm_start, station_id)
+    if error:
+        return error
+
+    if stream and "station_id" in df.columns:
+        def generate_ndjson():
+            for sid, result in sst_module.iter_station_forecasts(df, warm_start=warm_start, engine=engine):
+                line = jsonable_encoder({"station_id": str(sid), **result})
+                yield json.dumps(line) + "\n"
+
+        return StreamingResponse(generate_ndjson(), media_type="application/x-ndjson")
+
+    try:
+        return await run_cpu(run_sst_forecast, df, warm_start, station_id, engine)
+    except ValueError as e:
+        return {"error": str(e)}
+
+
+def validate_sst_request(df: "pd.DataFrame", engine: str, warm_start: bool, station_id: str):
+    """Returns an {"error": ...} dict for invalid SST requests, else None"""
+    required_cols = {"date", "value"}
+    if not required_cols.issubset(df.columns):
+        return {
+            "error": f"SST CSV must contain columns: {required_cols}. Found: {list(df.columns)}"
+        }
+
+    if engine not in sst.SST_ENGINES:
+        return {"error": f"Unknown engine '{engine}'. Choose one of: {list(sst.SST_ENGINES)}"}
+
+    if warm_start and not station_id and "station_id" not in df.columns:
+        return {"error": "warm_start requires a station_id query parameter for single-series uploads"}
+
+    return None
+
+
+def run_sst_forecast(df: "pd.DataFrame", warm_start: bool = False, station_id: str = None,
+                     engine: str = "prophet") -> dict:
+    """Non-streaming SST forecast, shared by the endpoint and the sst_forecast job"""
+    if "station_id" in df.columns:
+        return sst.forecast_sst_multi_station(df, warm_start=warm_start, engine=engine)
+
+    return sst.forecast_sst_from_csv(
+        df,
+        station_id=station_id if warm_start else None,
+        engine=engine
+    )
+
+
+@app.get("/api/predict/sst/stats")
+def sst_stats():
+    """Cache counters for SST forecasting (fitted models and forecasts)"""
+    return {**sst.get_sst_cache_stats(), **heatwaves.get_heatwave_cache_stats()}
+
+
+@app.post("/api/predict/sst/heatwaves")
+async def detect_sst_heatwaves(file: UploadFile = File(...), percentile: float = 90.0,
+                               min_duration: int = 5, max_gap: int = 2,
+                               baseline_start: int = None, baseline_end: int = None):
+    """
+    Marine heatwave detection on daily SST.
+
+    CSV columns: date,value (optional: station_id for many stations at once)
+
+    A heatwave is at least `min_duration` days above the day-of-year
+    `percentile` threshold; events separated by `max_gap` days or fewer are
+    merged. baseline_start/baseline_end restrict the climatology period.
     """
-    df = pd.read_csv(file.file)
+    pandas = await registry.aget("pandas")
+    df = await run_cpu(pandas.read_csv, file.file)
     df.columns = df.columns.str.lower().str.strip()
 
     required_cols = {"date", "value"}
@@ -123,8 +387,19 @@ async def predict_sst_csv(file: UploadFile = File(...)):
             "error": f"SST CSV must contain columns: {required_cols}. Found: {list(df.columns)}"
         }
 
-    result = forecast_sst_from_csv(df)
-    return result
+    if (baseline_start is None) != (baseline_end is None):
+        return {"error": "Provide both baseline_start and baseline_end, or neither"}
+    baseline = (baseline_start, baseline_end) if baseline_start is not None else None
+
+    heatwave_module = await registry.aget("heatwaves")
+    try:
+        return await run_cpu(
+            heatwave_module.detect_marine_heatwaves,
+            df, percentile=percentile, min_duration=min_duration,
+            max_gap=max_gap, baseline=baseline,
+        )
+    except ValueError as e:
+        return {"error": str(e)}
 
 
 # 4️⃣ Helper Endpoint (for frontend clarity)
@@ -138,9 +413,6 @@ def sst_info():
 
 # MULTI-AGENT ORCHESTRATION ENDPOINTS
 # -----------------------------
-from Agents.orchestrator import orchestrate, auto_route
-from Agents.overfishing_agent import analyze_overfishing
-
 @app.post("/api/orchestrate")
 async def orchestrate_request(input_type: str, data: dict):
     """
@@ -151,14 +423,16 @@ async def orchestrate_request(input_type: str, data: dict):
         input_type: "image", "species_query", "telemetry", "telemetry_batch"
         data: Input data for the agent
     """
-    return orchestrate(input_type, data)
+    orchestrator = await registry.aget("agents")
+    return await run_llm(orchestrator.orchestrate, input_type, data)
 
 @app.post("/api/auto_route")
 async def auto_route_request(data: dict):
     """
     Automatically detect input type and route to appropriate agent.
     """
-    return auto_route(data)
+    orchestrator = await registry.aget("agents")
+    return await run_llm(orchestrator.auto_route, data)
 # 5️⃣ Overfishing Monitor - GET (Mock Data)
 @app.get("/api/overfishing_monitor")
 def get_overfishing_data():
@@ -179,95 +453,95 @@ async def analyze_overfishing_csv(file: UploadFile = File(...)):
     
     This endpoint now uses the multi-agent system for enhanced insights.
     """
-    from services.overfishing_analyze import analyze_overfishing_from_csv
-
     try:
-        df = pd.read_csv(file.file)
-        
-        # Get visualization data
-        viz_data = analyze_overfishing_from_csv(df=df)
-        
-        # Use OverfishingAgent for AI-powered insights on the MOST SEVERE overfishing instance
-        agent_insights = None
-        max_violation_margin = -1
-        
-        for _, row in df.iterrows():
-            telemetry = {
-                "date": row.get("date", row.get("Date", "Unknown")),
-                "stock_volume": row.get("stock_volume", row.get("Stock_Volume", 0)),
-                "catch_volume": row.get("catch_volume", row.get("Catch_Volume", 0))
-            }
-            
-            # Use quick local check before calling full agent to save time
-            stock = telemetry["stock_volume"]
-            catch = telemetry["catch_volume"]
-            threshold = stock * 0.2
-            
-            if catch > threshold:
-                violation_margin = catch - threshold
-                
-                # Update if this is the most severe violation found so far
-                if violation_margin > max_violation_margin:
-                    max_violation_margin = violation_margin
-                    # Analyze this specific severe instance with the agent
-                    agent_insights = analyze_overfishing(telemetry)
-        
-        # Combine visualization data with agent insights
-        return {
-            "visualization": viz_data,
-            "agent_analysis": agent_insights
-        }
-        
+        pandas = await registry.aget("pandas")
+        df = await run_cpu(pandas.read_csv, file.file)
+        # Dominated by the per-violation agent (LLM) calls
+        return await run_llm(run_overfishing_analysis, df)
+
     except ValueError as e:
         return {"error": str(e)}
     except Exception as e:
         return {"error": f"Failed to process CSV: {str(e)}"}
 
 
+def run_overfishing_analysis(df: "pd.DataFrame") -> dict:
+    """Visualization + agent insights, shared by the endpoint and the overfishing_analysis job"""
+    from services.overfishing_analyze import analyze_overfishing_from_csv
+
+    # Get visualization data
+    viz_data = analyze_overfishing_from_csv(df=df)
+    
+    # Use OverfishingAgent for AI-powered insights on the MOST SEVERE overfishing instance
+    agent_insights = None
+    max_violation_margin = -1
+    
+    for _, row in df.iterrows():
+        telemetry = {
+            "date": row.get("date", row.get("Date", "Unknown")),
+            "stock_volume": row.get("stock_volume", row.get("Stock_Volume", 0)),
+            "catch_volume": row.get("catch_volume", row.get("Catch_Volume", 0))
+        }
+        
+        # Use quick local check before calling full agent to save time
+        stock = telemetry["stock_volume"]
+        catch = telemetry["catch_volume"]
+        threshold = stock * 0.2
+        
+        if catch > threshold:
+            violation_margin = catch - threshold
+            
+            # Update if this is the most severe violation found so far
+            if violation_margin > max_violation_margin:
+                max_violation_margin = violation_margin
+                # Analyze this specific severe instance with the agent
+                agent_insights = agents.analyze_overfishing(telemetry)
+    
+    # Combine visualization data with agent insights
+    return {
+        "visualization": viz_data,
+        "agent_analysis": agent_insights
+    }
+
+
 # 7️⃣ eDNA Analysis - Sequence Upload with GenAI
 @app.post("/api/v1/edna/analyze")
-async def analyze_edna_sequence(file: UploadFile = File(...)):
+async def analyze_edna_sequence(file: UploadFile = File(...), qc: bool = True):
     """
-    Analyze eDNA sequence from FASTA/FASTQ file using GenAI.
+    Analyze eDNA sequences from a FASTA/FASTQ file using GenAI.
     
-    Accepts: .fasta, .fastq, .fa, .fq files
+    Accepts: .fasta, .fastq, .fa, .fq files, optionally gzipped (.gz)
+    
+    Records are streamed from the upload, so multi-record runs are read in
+    bounded memory and every record is counted. With a reference index
+    (see /api/v1/edna/reference) reads are identified locally by k-mer
+    matching and GenAI only profiles the detected species. FASTQ reads are
+    quality trimmed and filtered first unless ?qc=false; "run.qc" reports
+    reads in / passed and mean quality.
     
     Returns:
         {
-            "species_scientific": str,
-            "species_common": str,
-            "confidence": float (0-100),
-            "genetic_markers": list,
-            "invasive_status": str,
-            "characteristics": dict,
-            "ecological_role": str,
-            "interesting_facts": list
+            "success": True,
+            "analysis": analysis of the first record {
+                "species_scientific": str,
+                "species_common": str,
+                "confidence": float (0-100),
+                "genetic_markers": list,
+                "invasive_status": str,
+                "characteristics": dict,
+                "ecological_role": str,
+                "interesting_facts": list
+            },
+            "analyses": [analysis per detected species, or per record without a reference index],
+            "detected_species": [one entry per analysis, with "reads"],
+            "invasive_species": [...],
+            "run": {"records": int, "analyzed": int, "not_analyzed": int, ...}
         }
     """
-    from services.edna_analyzer import analyze_edna_file
-    
     try:
-        # Read file content
-        file_content = await file.read()
-        file_text = file_content.decode('utf-8')
-        
-        # Analyze eDNA sequence
-        analysis = analyze_edna_file(file_text)
-        
-        return {
-            "success": True,
-            "analysis": analysis,
-            "detected_species": [{
-                "species": analysis.get("species_common", "Unknown"),
-                "confidence": analysis.get("confidence", 0),
-                "invasive": analysis.get("invasive_status") == "invasive",
-                "sequenceId": analysis.get("sequence_metadata", {}).get("sequence_id", "Unknown")
-            }],
-            "invasive_species": [{
-                "species": analysis.get("species_common", "Unknown")
-            }] if analysis.get("invasive_status") == "invasive" else []
-        }
-        
+        # Records are parsed straight from the spooled upload, off the event loop
+        return await run_llm(run_edna_analysis, file.file, qc)
+
     except Exception as e:
         return {
             "success": False,
@@ -275,6 +549,65 @@ async def analyze_edna_sequence(file: UploadFile = File(...)):
         }
 
 
+def run_edna_analysis(source, qc: bool = True) -> dict:
+    """eDNA analysis response, shared by the endpoint and the edna_analysis job"""
+    # Analyze eDNA sequences
+    result = edna.analyze_edna_file(source, qc=qc)
+    analyses = result["analyses"]
+    if not result["run"]["records"]:
+        return {"success": False, "error": "No sequences found in file"}
+
+    invasive = []
+    for analysis in analyses:
+        species = analysis.get("species_common", "Unknown")
+        if analysis.get("invasive_status") == "invasive" and species not in invasive:
+            invasive.append(species)
+
+    return {
+        "success": True,
+        "analysis": analyses[0] if analyses else None,
+        "analyses": analyses,
+        "detected_species": [{
+            "species": analysis.get("species_common", "Unknown"),
+            "confidence": analysis.get("confidence", 0),
+            "invasive": analysis.get("invasive_status") == "invasive",
+            "sequenceId": analysis.get("sequence_metadata", {}).get("sequence_id", "Unknown"),
+            "reads": analysis.get("identification", {}).get("reads", analysis.get("abundance", 1))
+        } for analysis in analyses],
+        "invasive_species": [{"species": species} for species in invasive],
+        "run": result["run"]
+    }
+
+
+@app.post("/api/v1/edna/reference")
+async def build_edna_reference(file: UploadFile = File(...), k: int = None):
+    """
+    Build the local eDNA reference index from a barcode library and make it active.
+    
+    Accepts: reference FASTA (COI / 12S / 16S), optionally gzipped; each
+    header names the taxon, e.g. ">MN123|Thunnus_albacares"
+    
+    Returns:
+        {"success": True, "index": {"k", "taxa", "references", "kmers", "postings", "size_mb"}}
+    """
+    edna_module = await registry.aget("edna")
+    try:
+        stats = await run_cpu(edna_module.build_reference_index, file.file, k)
+    except ValueError as e:
+        return {"success": False, "error": str(e)}
+    return {"success": True, "index": stats}
+
+
+@app.get("/api/v1/edna/reference")
+async def get_edna_reference():
+    """Statistics of the active eDNA reference index"""
+    edna_module = await registry.aget("edna")
+    index = edna_module.get_reference_index()
+    if index is None:
+        return {"loaded": False, "path": edna_module.EDNA_REFERENCE_INDEX}
+    return {"loaded": True, "index": index.stats()}
+
+
 class ChatRequest(BaseModel):
     species_data: dict
     question: str
@@ -294,10 +627,9 @@ async def chat_about_edna_species(request: ChatRequest):
             "conversation_length": int
         }
     """
-    from services.edna_analyzer import chat_with_species
-    
     try:
-        response = chat_with_species(request.species_data, request.question)
+        edna_module = await registry.aget("edna")
+        response = await run_llm(edna_module.chat_with_species, request.species_data, request.question)
         return {
             "success": True,
             **response
@@ -311,12 +643,19 @@ async def chat_about_edna_species(request: ChatRequest):
 
 # 8️⃣ Fish Species Classification - Image Upload (with Multi-Agent Integration)
 @app.post("/api/predict/fish_species")
-async def classify_fish_species(file: UploadFile = File(...)):
+async def classify_fish_species(file: UploadFile = File(...), timings: bool = False):
     """
     Classify fish species from an uploaded image using FisheriesAgent.
     
     Accepts: JPG, PNG, WebP, and other common image formats
     
+    With ?timings=true the response carries "timings_ms" with the
+    decode / hash / resize / normalize / forward stage times of this image
+    (the request then runs on its own instead of in a shared batch).
+    
+    Re-uploads of the same (or a near-identical) photo are answered from a
+    perceptual-hash cache without running the classifier or the agent again.
+    
     Returns:
         {
             "species": str,
@@ -325,34 +664,50 @@ async def classify_fish_species(file: UploadFile = File(...)):
             "biological_data": dict (from FisheriesAgent)
         }
     """
-    from PIL import Image
-    import io
-    
     try:
-        # Lazy import to avoid loading heavy PyTorch on every reload
-        from services.fish_classifier import predict_fish_species
-        from Agents.fisheries_agent import classify_fish
+        # Loads PyTorch and the model on first use, off the event loop
+        classifier = await registry.aget("fish_classifier")
+        orchestrator = await registry.aget("agents")
         
         # Read image file
         image_bytes = await file.read()
-        image = Image.open(io.BytesIO(image_bytes))
+        stage_timings = {} if timings else None
+        image, image_hash = await run_cpu(classifier.decode_and_hash, image_bytes, timings=stage_timings)
         
-        # Make prediction using fish classifier
-        classifier_result = predict_fish_species(image)
+        # Near-duplicate of an earlier upload: reuse its classification (and enrichment)
+        cached = classifier.fish_result_cache.get(image_hash)
+        if cached is not None:
+            entry = cached[0]
+        else:
+            # Make prediction using fish classifier
+            # (concurrent requests share one batched forward pass)
+            if timings:
+                classifier_result = await run_cpu(classifier.predict_fish_species, image, timings=stage_timings)
+            else:
+                classifier_result = await classifier.predict_fish_species_async(image)
+            entry = {"classification": classifier_result}
+            classifier.fish_result_cache.put(image_hash, entry)
         
         # Use FisheriesAgent to enrich with biological data
-        try:
-            agent_result = classify_fish(classifier_result)
-            return agent_result
-        except Exception as e:
-            print(f"⚠️ FisheriesAgent Error: {e}")
-            # Fallback to classifier result only
-            return {
-                "classification": classifier_result,
-                "biological_data": {
-                    "error": f"Failed to retrieve biological data: {str(e)}"
+        if "agent_result" in entry:
+            agent_result = dict(entry["agent_result"])
+        else:
+            try:
+                agent_result = await run_llm(orchestrator.classify_fish, entry["classification"])
+                entry["agent_result"] = dict(agent_result)
+            except Exception as e:
+                print(f"⚠️ FisheriesAgent Error: {e}")
+                # Fallback to classifier result only
+                agent_result = {
+                    "classification": entry["classification"],
+                    "biological_data": {
+                        "error": f"Failed to retrieve biological data: {str(e)}"
+                    }
                 }
-            }
+        
+        if timings:
+            agent_result["timings_ms"] = {stage: round(ms, 2) for stage, ms in stage_timings.items()}
+        return agent_result
         
     except Exception as e:
         return {
@@ -362,6 +717,148 @@ async def classify_fish_species(file: UploadFile = File(...)):
         }
 
 
+@app.get("/api/predict/fish_species/stats")
+def fish_species_stats():
+    """
+    Perceptual-hash cache hit rate and micro-batch counters for fish
+    classification (without loading the model).
+    """
+    if not registry.is_loaded("fish_classifier"):
+        return {"loaded": False}
+    
+    classifier = registry.get("fish_classifier")
+    return {
+        "loaded": True,
+        "result_cache": classifier.fish_result_cache.stats(),
+        "microbatching": classifier.fish_batcher.stats()
+    }
+
+
+# Fish Species Classification - many images / zip archive per request
+@app.post("/api/predict/fish_species/batch")
+async def classify_fish_species_batch(files: List[UploadFile] = File(...), enrich: bool = False,
+                                      batch_size: int = None, timings: bool = False):
+    """
+    Classify many fish images in one request (e.g. all frames of a haul).
+    
+    Accepts: several image files and/or .zip archives of images
+    
+    Images are decoded in parallel and run through the model in tensor
+    batches of `batch_size` (default FISH_BATCH_SIZE). With ?enrich=true
+    each distinct species is enriched once by FisheriesAgent and attached
+    to every image classified as that species. ?timings=true adds
+    "timings_ms" with the decode / resize / normalize / forward stage times.
+    
+    Returns:
+        {
+            "count": int,
+            "results": [{"filename": str, "classification": {...}, "biological_data": dict}, ...]
+        }
+    """
+    classifier = await registry.aget("fish_classifier")
+    uploads = [(file.filename, await file.read()) for file in files]
+    
+    stage_timings = {} if timings else None
+    try:
+        results = await run_cpu(
+            classifier.classify_image_files, uploads,
+            batch_size=batch_size or classifier.FISH_BATCH_SIZE,
+            timings=stage_timings
+        )
+    except Exception as e:
+        return {"error": f"Failed to classify images: {str(e)}"}
+    
+    if enrich:
+        orchestrator = await registry.aget("agents")
+        await run_llm(enrich_fish_results, orchestrator.classify_fish, results)
+    
+    response = {
+        "count": len(results),
+        "results": results
+    }
+    if timings:
+        response["timings_ms"] = {stage: round(ms, 2) for stage, ms in stage_timings.items()}
+    return response
+
+
+# Fish Species Classification - frame sequences (onboard camera video)
+@app.post("/api/predict/fish_species/stream")
+async def classify_fish_species_stream(files: List[UploadFile] = File(...), window: int = None,
+                                       sample_every: int = 1, skip_distance: int = None):
+    """
+    Classify a sequence of frames and stream smoothed detections as they are produced.
+    
+    Accepts: frames as several image files, multi-frame TIFF/GIF files and/or
+    .zip archives of frames, in stream order
+    
+    Frames are decoded and classified FISH_STREAM_CHUNK_FRAMES at a time;
+    every `sample_every`-th frame is used. Frames within `skip_distance`
+    perceptual-hash bits of the last classified frame reuse its prediction
+    instead of running the model. Predictions are averaged over the last
+    `window` frames (defaults FISH_STREAM_WINDOW / FISH_STREAM_SKIP_DISTANCE).
+    
+    Returns:
+        NDJSON stream: one line per sampled frame
+            {"frame": int, "name": str, "skipped": bool, "raw": {...}, "smoothed": {...}, "changed": bool},
+        then a final {"summary": {...}} line with frame counts, skip rate and throughput
+    """
+    if sample_every < 1 or (window is not None and window < 1):
+        return {"error": "window and sample_every must be at least 1"}
+    
+    classifier = await registry.aget("fish_classifier")
+    uploads = [(file.filename, await file.read()) for file in files]
+    
+    stream = classifier.FrameSequenceClassifier(
+        window=window or classifier.FISH_STREAM_WINDOW,
+        skip_distance=classifier.FISH_STREAM_SKIP_DISTANCE if skip_distance is None else skip_distance,
+        sample_every=sample_every
+    )
+    frames = classifier.iter_frames(uploads, sample_every=sample_every)
+    
+    async def generate_ndjson():
+        while True:
+            received = stream.frames_received
+            chunk = itertools.islice(frames, classifier.FISH_STREAM_CHUNK_FRAMES)
+            try:
+                events = await run_cpu(stream.process, chunk)
+            except Exception as e:
+                yield json.dumps({"error": f"Failed to classify frames: {str(e)}"}) + "\n"
+                break
+            
+            for event in events:
+                yield json.dumps(event) + "\n"
+            if stream.frames_received == received:
+                break
+        
+        yield json.dumps({"summary": stream.summary()}) + "\n"
+    
+    return StreamingResponse(generate_ndjson(), media_type="application/x-ndjson")
+
+
+def enrich_fish_results(classify_fish, results: list):
+    """Attach FisheriesAgent biological data, one agent call per distinct species"""
+    by_species = {}
+    for result in results:
+        classification = result.get("classification")
+        if classification is None:
+            continue
+        
+        species = classification["species"]
+        if species in by_species:
+            result["biological_data"] = by_species[species]
+            continue
+        
+        try:
+            biological_data = classify_fish(classification)["biological_data"]
+        except Exception as e:
+            biological_data = {"error": f"Failed to retrieve biological data: {str(e)}"}
+        
+        # Low-confidence results skip the lookup, so only reuse real lookups
+        if biological_data.get("data_source") != "none":
+            by_species[species] = biological_data
+        result["biological_data"] = biological_data
+
+
 # 9️⃣ AWS Bedrock Agents - Fisheries Intelligence
 class AgentQuery(BaseModel):
     query: str
@@ -387,9 +884,8 @@ async def query_fisheries_bedrock_agent(request: AgentQuery):
         - "What conservation measures should be taken for overfished stocks?"
     """
     try:
-        from aws.agents import invoke_fisheries_agent
-        
-        response = invoke_fisheries_agent(request.query)
+        bedrock = await registry.aget("aws_agents")
+        response = await run_llm(bedrock.invoke_fisheries_agent, request.query)
         
         return {
             "success": True,
@@ -426,9 +922,8 @@ async def query_overfishing_bedrock_agent(request: AgentQuery):
         - "Analyze the sustainability of current catch rates"
     """
     try:
-        from aws.agents import invoke_overfishing_agent
-        
-        response = invoke_overfishing_agent(request.query)
+        bedrock = await registry.aget("aws_agents")
+        response = await run_llm(bedrock.invoke_overfishing_agent, request.query)
         
         return {
             "success": True,
@@ -486,6 +981,101 @@ async def check_aws_agents_status():
         }
 
 
+# 🔟 Background Jobs - submit / status / result / cancel
+# -----------------------------
+from services.jobs import job_manager
+
+
+@app.on_event("startup")
+def recover_interrupted_jobs():
+    """Mark jobs a previous server left queued/running as interrupted"""
+    recovered = job_manager.store.recover_interrupted()
+    if recovered:
+        print(f"⚠️ Marked {recovered} unfinished job(s) from a previous run as interrupted")
+
+
+def _sst_forecast_job(payload: bytes, params: dict) -> dict:
+    df = pd.read_csv(io.BytesIO(payload))
+    df.columns = df.columns.str.lower().str.strip()
+
+    engine = params.get("engine", "prophet")
+    warm_start = bool(params.get("warm_start", False))
+    station_id = params.get("station_id")
+
+    error = validate_sst_request(df, engine, warm_start, station_id)
+    if error:
+        raise ValueError(error["error"])
+
+    return jsonable_encoder(run_sst_forecast(df, warm_start, station_id, engine))
+
+
+def _edna_analysis_job(payload: bytes, params: dict) -> dict:
+    return jsonable_encoder(run_edna_analysis(payload, qc=bool(params.get("qc", True))))
+
+
+def _overfishing_analysis_job(payload: bytes, params: dict) -> dict:
+    return jsonable_encoder(run_overfishing_analysis(pd.read_csv(io.BytesIO(payload))))
+
+
+job_manager.register("sst_forecast", _sst_forecast_job)
+job_manager.register("edna_analysis", _edna_analysis_job)
+job_manager.register("overfishing_analysis", _overfishing_analysis_job)
+
+
+@app.post("/api/jobs/{job_type}")
+async def submit_job(job_type: str, file: UploadFile = File(...), params: str = Form("{}")):
+    """
+    Submit a long-running job and poll for it instead of holding the request open.
+
+    Args:
+        job_type: "sst_forecast", "edna_analysis" or "overfishing_analysis"
+        file: The same upload the synchronous endpoint accepts
+        params: JSON object of options, e.g. {"engine": "harmonic"} for sst_forecast
+
+    Returns:
+        Job status including job_id (poll /api/jobs/{job_id})
+    """
+    try:
+        options = json.loads(params)
+        if not isinstance(options, dict):
+            raise ValueError("params must be a JSON object")
+    except ValueError as e:
+        return {"error": f"Invalid params: {str(e)}"}
+
+    payload = await file.read()
+    try:
+        return job_manager.submit(job_type, payload, options)
+    except ValueError as e:
+        return {"error": str(e)}
+
+
+@app.get("/api/jobs/{job_id}")
+def get_job_status(job_id: str):
+    status = job_manager.status(job_id)
+    if status is None:
+        return {"error": f"Job {job_id} not found"}
+    return status
+
+
+@app.get("/api/jobs/{job_id}/result")
+def get_job_result(job_id: str):
+    status = job_manager.status(job_id)
+    if status is None:
+        return {"error": f"Job {job_id} not found"}
+    if status["status"] != "succeeded":
+        return {"error": f"Job is {status['status']}", "status": status}
+    return job_manager.result(job_id)
+
+
+@app.post("/api/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    """Cancel a queued job; a running job finishes but its result is discarded"""
+    status = job_manager.cancel(job_id)
+    if status is None:
+        return {"error": f"Job {job_id} not found"}
+    return status
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="127.0.0.1", port=8000)
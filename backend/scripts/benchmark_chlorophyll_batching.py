@@ -0,0 +1,84 @@
+"""
+Throughput and tail-latency benchmark for the chlorophyll micro-batcher.
+
+Fires N concurrent single-point predictions through MicroBatcher at several
+max batch sizes and reports requests/s plus p50/p99 latency, next to the
+uncoalesced baseline (one predict_chlorophyll call per request).
+
+Usage (from backend/):
+    python scripts/benchmark_chlorophyll_batching.py
+"""
+
+import asyncio
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+
+# Add backend root to sys.path so we can import 'services'
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_root = os.path.abspath(os.path.join(current_dir, ".."))
+if backend_root not in sys.path:
+    sys.path.append(backend_root)
+
+from services.batching import MicroBatcher
+from services.predict import predict_chlorophyll, _predict_rows
+
+warnings.filterwarnings("ignore", category=UserWarning)
+
+N_REQUESTS = 2000
+MAX_WAIT_MS = 2.0
+
+
+def random_rows(n_rows: int):
+    rng = np.random.default_rng(0)
+    return list(zip(
+        rng.uniform(0, 200, n_rows),
+        rng.uniform(30, 38, n_rows),
+        rng.uniform(7.6, 8.4, n_rows),
+    ))
+
+
+async def timed(coro):
+    start = time.perf_counter()
+    await coro
+    return time.perf_counter() - start
+
+
+async def run_unbatched(rows):
+    loop = asyncio.get_running_loop()
+    return await asyncio.gather(*[
+        timed(loop.run_in_executor(None, predict_chlorophyll, *row)) for row in rows
+    ])
+
+
+async def run_batched(rows, max_batch_size: int):
+    batcher = MicroBatcher(_predict_rows, max_batch_size=max_batch_size, max_wait_ms=MAX_WAIT_MS)
+    latencies = await asyncio.gather(*[timed(batcher.submit(row)) for row in rows])
+    return latencies, batcher.stats()
+
+
+def report(name: str, latencies, elapsed: float):
+    p50, p99 = np.percentile(latencies, [50, 99]) * 1e3
+    print(f"  {name:22s} {len(latencies) / elapsed:9.0f} req/s   p50 {p50:8.1f} ms   p99 {p99:8.1f} ms")
+
+
+def main():
+    rows = random_rows(N_REQUESTS)
+    print(f"⚡ {N_REQUESTS} concurrent single-point requests (max wait {MAX_WAIT_MS} ms)\n")
+
+    start = time.perf_counter()
+    latencies = asyncio.run(run_unbatched(rows))
+    report("unbatched", latencies, time.perf_counter() - start)
+
+    for max_batch_size in [8, 32, 64, 128, 256]:
+        start = time.perf_counter()
+        latencies, stats = asyncio.run(run_batched(rows, max_batch_size))
+        report(f"batch<={max_batch_size} (avg {stats['mean_batch_size']})",
+               latencies, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
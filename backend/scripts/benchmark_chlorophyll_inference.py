@@ -0,0 +1,77 @@
+"""
+Microbenchmark for chlorophyll inference engines.
+
+Reports p50/p95 latency of sklearn's RandomForestRegressor.predict and the
+array-backed FlatForest engine for the single-row path, and throughput for
+batches. Parity between the two is covered by tests/test_forest_inference.py.
+
+Usage (from backend/):
+    python scripts/benchmark_chlorophyll_inference.py
+"""
+
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+
+# Add backend root to sys.path so we can import 'services'
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_root = os.path.abspath(os.path.join(current_dir, ".."))
+if backend_root not in sys.path:
+    sys.path.append(backend_root)
+
+from services.predict import model
+from services.forest_inference import FlatForest
+
+# sklearn warns on every call when fed arrays without feature names
+warnings.filterwarnings("ignore", category=UserWarning)
+
+
+def random_inputs(n_rows: int, seed: int = 0) -> np.ndarray:
+    """Generate depth/salinity/ph rows in realistic ranges"""
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        rng.uniform(0, 200, n_rows),    # depth (m)
+        rng.uniform(30, 38, n_rows),    # salinity (PSU)
+        rng.uniform(7.6, 8.4, n_rows),  # pH
+    ])
+
+
+def time_calls(fn, repeats: int) -> np.ndarray:
+    timings = np.empty(repeats)
+    for i in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings[i] = time.perf_counter() - start
+    return timings
+
+
+def main():
+    start = time.perf_counter()
+    flat = FlatForest.from_sklearn(model)
+    print(f"🌲 Flattened {flat.n_trees} trees / {len(flat.value)} nodes "
+          f"(max depth {flat.max_depth}) in {(time.perf_counter() - start) * 1e3:.1f} ms")
+
+    row = random_inputs(1, seed=2)
+    sk_single = time_calls(lambda: model.predict(row), repeats=200)
+    flat_single = time_calls(lambda: flat.predict_one(row[0]), repeats=2000)
+
+    print("\nSingle-row latency")
+    for name, timings in [("sklearn", sk_single), ("flat", flat_single)]:
+        p50, p95 = np.percentile(timings, [50, 95]) * 1e6
+        print(f"  {name:8s} p50 {p50:10.1f} µs   p95 {p95:10.1f} µs")
+    speedup = np.median(sk_single) / np.median(flat_single)
+    print(f"  p50 speedup: {speedup:.1f}x")
+
+    print("\nBatch throughput (rows/s)")
+    for n_rows in [16, 128, 1024, 16384]:
+        X = random_inputs(n_rows, seed=3)
+        sk_t = np.median(time_calls(lambda: model.predict(X), repeats=10))
+        flat_t = np.median(time_calls(lambda: flat.predict(X), repeats=10))
+        print(f"  n={n_rows:6d}  sklearn {n_rows / sk_t:12.0f}   flat {n_rows / flat_t:12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Parity check and throughput benchmark for vectorized FASTQ quality control.
+
+Simulates reads whose quality decays toward the 3' end (as on Illumina
+runs), with occasional N calls, and runs them through ReadQC (batched NumPy,
+on 2-bit packed batches, as the eDNA pipeline feeds it) and through a
+straightforward per-read, per-base Python implementation of the same
+rules. Exits with code 1 if the two disagree on any read.
+
+Usage (from backend/):
+    python scripts/benchmark_edna_read_qc.py [n_reads] [read_length]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+# Add backend root to sys.path so we can import 'services'
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_root = os.path.abspath(os.path.join(current_dir, ".."))
+if backend_root not in sys.path:
+    sys.path.append(backend_root)
+
+from services.read_qc import ReadQC
+from services.packed_sequences import iter_batches
+from services.sequence_io import EDNA_BATCH_READS, SequenceRecord
+
+
+def simulated_reads(n_reads: int, read_length: int, rng):
+    bases = np.frombuffer(b"ACGTN", dtype=np.uint8)
+    # Mean quality falls from ~36 to ~18 along the read, with per-read spread
+    decay = np.linspace(36, 18, read_length)[None, :] + rng.normal(0, 4, (n_reads, 1))
+    quality = np.clip(decay + rng.normal(0, 5, (n_reads, read_length)), 2, 41).astype(np.uint8) + 33
+    codes = rng.choice(5, (n_reads, read_length), p=[0.2495, 0.2495, 0.2495, 0.2495, 0.002])
+    sequences = bases[codes]
+    return [
+        SequenceRecord(f"read{i}", sequences[i].tobytes(), quality[i].tobytes(), "FASTQ")
+        for i in range(n_reads)
+    ]
+
+
+def reference_qc(read: SequenceRecord, qc: ReadQC):
+    """Per-read, per-base Python version of the ReadQC rules"""
+    phred = [max(0, q - qc.phred_offset) for q in read.quality]
+    length = len(phred)
+    for start in range(0, length - qc.window + 1):
+        if sum(phred[start:start + qc.window]) < qc.min_window_quality * qc.window:
+            length = start
+            break
+
+    if length < qc.min_length:
+        return None
+    if sum(1 for b in read.sequence[:length] if b not in b"ACGT") > qc.max_ns:
+        return None
+    if sum(10 ** (-q / 10) for q in phred[:length]) > qc.max_expected_errors:
+        return None
+    return read.sequence[:length]
+
+
+def main(n_reads: int = 50000, read_length: int = 150):
+    rng = np.random.default_rng(0)
+    reads = simulated_reads(n_reads, read_length, rng)
+
+    batches = list(iter_batches(reads, EDNA_BATCH_READS))
+    qc = ReadQC()
+    start = time.perf_counter()
+    passed = list(qc.filter(batches))
+    vectorized_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = [r for r in (reference_qc(read, qc) for read in reads) if r is not None]
+    loop_seconds = time.perf_counter() - start
+
+    print(f"🧪 {n_reads} simulated {read_length}bp reads\n")
+    print(f"  per-read Python loop  {n_reads / loop_seconds:10.0f} reads/s")
+    print(f"  vectorized ReadQC     {n_reads / vectorized_seconds:10.0f} reads/s   "
+          f"({loop_seconds / vectorized_seconds:.0f}x faster)\n")
+
+    stats = qc.stats()
+    for key in ("reads_in", "reads_passed", "reads_trimmed", "failed_min_length", "failed_n_content",
+                "failed_expected_errors", "bases_in", "bases_out", "mean_quality_in", "mean_quality_out"):
+        print(f"  {key:24s} {stats[key]}")
+
+    if [batch.sequence(i) for batch in passed for i in range(len(batch))] != expected:
+        print("\n❌ Vectorized QC disagrees with the per-read reference")
+        sys.exit(1)
+    print("\n✅ Vectorized QC matches the per-read reference on every read")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
@@ -0,0 +1,117 @@
+"""
+Concurrency benchmark: cheap-request latency while expensive requests run.
+
+Builds a small ASGI app with a cheap endpoint and two copies of an
+expensive one (a large chlorophyll batch prediction): one calls the model
+inline on the event loop, the other offloads it with run_cpu. For each
+variant, fires a stream of cheap requests while expensive requests are in
+flight and reports the cheap requests' p50/p99 latency.
+
+Usage (from backend/):
+    python scripts/benchmark_event_loop_offload.py [n_expensive] [rows_per_request]
+"""
+
+import asyncio
+import os
+import sys
+import time
+import warnings
+
+import httpx
+import numpy as np
+from fastapi import FastAPI
+
+# Add backend root to sys.path so we can import 'services'
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_root = os.path.abspath(os.path.join(current_dir, ".."))
+if backend_root not in sys.path:
+    sys.path.append(backend_root)
+
+from services.executors import run_cpu, get_executor_stats
+from services.predict import predict_chlorophyll_batch
+
+warnings.filterwarnings("ignore", category=UserWarning)
+
+N_CHEAP = 200
+CHEAP_INTERVAL_S = 0.005
+EXPENSIVE_INTERVAL_S = 0.1
+
+
+def build_app(rows: np.ndarray) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/cheap")
+    async def cheap():
+        return {"ok": True}
+
+    @app.post("/expensive/inline")
+    async def expensive_inline():
+        return {"mean": float(predict_chlorophyll_batch(rows, use_cache=False).mean())}
+
+    @app.post("/expensive/offloaded")
+    async def expensive_offloaded():
+        predictions = await run_cpu(predict_chlorophyll_batch, rows, use_cache=False)
+        return {"mean": float(predictions.mean())}
+
+    return app
+
+
+async def cheap_stream(client: httpx.AsyncClient):
+    """
+    Open-loop cheap requests: latency is measured from each request's
+    scheduled send time, so time spent waiting on a blocked loop counts.
+    """
+    latencies = []
+    t0 = time.perf_counter()
+    for i in range(N_CHEAP):
+        scheduled = t0 + i * CHEAP_INTERVAL_S
+        await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+        await client.get("/cheap")
+        latencies.append(time.perf_counter() - scheduled)
+    return latencies
+
+
+async def run_variant(app: FastAPI, path: str, n_expensive: int):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        cheap = asyncio.create_task(cheap_stream(client))
+
+        # Expensive requests arrive spread over the cheap request stream
+        expensive = []
+        for _ in range(n_expensive):
+            await asyncio.sleep(EXPENSIVE_INTERVAL_S)
+            expensive.append(asyncio.create_task(client.post(path)))
+
+        latencies = await cheap
+        await asyncio.gather(*expensive)
+        return latencies, time.perf_counter() - start
+
+
+def report(name: str, latencies, elapsed: float):
+    p50, p99, worst = np.percentile(latencies, [50, 99, 100]) * 1e3
+    print(f"  {name:12s} cheap p50 {p50:8.2f} ms   p99 {p99:8.2f} ms   max {worst:8.1f} ms"
+          f"   wall {elapsed:6.2f} s")
+
+
+def main(n_expensive: int = 8, rows_per_request: int = 200000):
+    rng = np.random.default_rng(0)
+    rows = np.column_stack([
+        rng.uniform(0, 200, rows_per_request),
+        rng.uniform(30, 38, rows_per_request),
+        rng.uniform(7.6, 8.4, rows_per_request),
+    ])
+    app = build_app(rows)
+
+    print(f"⚡ {N_CHEAP} cheap requests alongside {n_expensive} x {rows_per_request}-row predictions\n")
+
+    for name, path in [("inline", "/expensive/inline"), ("offloaded", "/expensive/offloaded")]:
+        latencies, elapsed = asyncio.run(run_variant(app, path, n_expensive))
+        report(name, latencies, elapsed)
+
+    print(f"\n📊 pool stats: {get_executor_stats()['cpu']}")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
@@ -0,0 +1,193 @@
+"""
+Parity check and latency / throughput benchmark for the fish classifier backends.
+
+Builds every inference backend (eager, torchscript, int8, onnx) from the same
+trained weights, compares each backend's top-3 predictions with the eager
+fp32 model on sample images, then times forward passes at several batch
+sizes. Exits with code 1 if a backend's top-1 agreement with eager falls
+below the threshold.
+
+Also compares preprocessing of camera-sized JPEGs: full decode + torchvision
+Compose versus the serving pipeline (draft-mode decode, resize, vectorized
+uint8 normalization).
+
+Usage (from backend/):
+    python scripts/benchmark_fish_classifier.py [image_dir] [min_top1_agreement]
+
+Without an image directory, synthetic images are used. The backend conversions
+themselves are covered by tests/test_fish_backends.py, which needs no trained
+weights.
+"""
+
+import io
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import torch
+from PIL import Image
+
+# Add backend root to sys.path so we can import 'services'
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_root = os.path.abspath(os.path.join(current_dir, ".."))
+if backend_root not in sys.path:
+    sys.path.append(backend_root)
+
+from services import fish_classifier as fc
+
+warnings.filterwarnings("ignore")
+
+BATCH_SIZES = [1, 8, 32]
+TIMED_RUNS = 10
+N_SYNTHETIC = 32
+CAMERA_SIZE = (4000, 3000)  # 12MP
+N_CAMERA_IMAGES = 8
+
+
+def load_images(image_dir: str = None):
+    if image_dir:
+        names = sorted(n for n in os.listdir(image_dir) if n.lower().endswith(fc.IMAGE_EXTENSIONS))
+        return [Image.open(os.path.join(image_dir, n)).convert("RGB") for n in names]
+
+    rng = np.random.default_rng(0)
+    return [
+        Image.fromarray((rng.random((480, 640, 3)) * 255).astype(np.uint8))
+        for _ in range(N_SYNTHETIC)
+    ]
+
+
+def camera_jpegs(n_images: int = N_CAMERA_IMAGES):
+    """Encoded 12MP JPEGs: smooth gradients plus noise, like a real photo compresses"""
+    rng = np.random.default_rng(1)
+    width, height = CAMERA_SIZE
+    x = np.linspace(0, 1, width, dtype=np.float32)[None, :, None]
+    y = np.linspace(0, 1, height, dtype=np.float32)[:, None, None]
+    blobs = []
+    for i in range(n_images):
+        colors = rng.random((1, 1, 3), dtype=np.float32)
+        pixels = 255 * (0.5 * x * colors + 0.3 * y + 0.2 * (1 - colors) * (i / n_images))
+        pixels = np.clip(pixels + rng.normal(0, 8, (height, width, 3)), 0, 255).astype(np.uint8)
+        buffer = io.BytesIO()
+        Image.fromarray(pixels).save(buffer, format="JPEG", quality=90)
+        blobs.append(buffer.getvalue())
+    return blobs
+
+
+def compare_preprocessing(eager, blobs):
+    """Legacy full decode + Compose vs draft decode + vectorized normalization"""
+    transform = fc.get_image_transforms()
+
+    start = time.perf_counter()
+    legacy = torch.stack([transform(Image.open(io.BytesIO(b)).convert("RGB")) for b in blobs])
+    legacy_ms = (time.perf_counter() - start) * 1e3 / len(blobs)
+
+    timings = {}
+    start = time.perf_counter()
+    images = [fc.load_image(b) for b in blobs]
+    fc._record(timings, "decode", start)
+    start = time.perf_counter()
+    images = [fc.resize_image(image) for image in images]
+    fc._record(timings, "resize", start)
+    start = time.perf_counter()
+    fast = fc.normalize_batch(images)
+    fc._record(timings, "normalize", start)
+    fast_ms = sum(timings.values()) / len(blobs)
+
+    stages = ", ".join(f"{stage} {ms / len(blobs):.1f}" for stage, ms in timings.items())
+    print(f"🖼️  {len(blobs)} x {CAMERA_SIZE[0]}x{CAMERA_SIZE[1]} JPEGs, per image:")
+    print(f"  full decode + Compose   {legacy_ms:8.1f} ms")
+    print(f"  draft decode + fast     {fast_ms:8.1f} ms   ({stages})  {legacy_ms / fast_ms:.1f}x faster")
+
+    top1, top3_sets, _ = parity(top3(eager, legacy), top3(eager, fast))
+    print(f"  mean |Δpixel| {(legacy - fast).abs().mean().item():.4f}   "
+          f"top1 agreement {top1:.1%}   top3 {top3_sets:.1%}\n")
+
+
+def to_batch(images) -> torch.Tensor:
+    transform = fc.get_image_transforms()
+    return torch.stack([transform(image) for image in images])
+
+
+def top3(inference_model, batch: torch.Tensor):
+    with torch.no_grad():
+        probabilities = torch.nn.functional.softmax(inference_model(batch), dim=1)
+    return torch.topk(probabilities, 3, dim=1)
+
+
+def parity(reference, candidate):
+    """Top-1 agreement, top-3 set agreement and max top-1 probability difference"""
+    ref_prob, ref_cls = reference
+    cand_prob, cand_cls = candidate
+    top1 = (ref_cls[:, 0] == cand_cls[:, 0]).float().mean().item()
+    top3_sets = np.mean([
+        set(r.tolist()) == set(c.tolist()) for r, c in zip(ref_cls, cand_cls)
+    ])
+    max_diff = (ref_prob[:, 0] - cand_prob[:, 0]).abs().max().item()
+    return top1, top3_sets, max_diff
+
+
+def time_batches(inference_model, batch: torch.Tensor):
+    results = {}
+    for size in BATCH_SIZES:
+        inputs = batch[:size] if len(batch) >= size else batch.repeat(size // len(batch) + 1, 1, 1, 1)[:size]
+        fc.warm_up(inference_model, torch.device("cpu"), runs=1)
+        timings = []
+        with torch.no_grad():
+            for _ in range(TIMED_RUNS):
+                start = time.perf_counter()
+                inference_model(inputs)
+                timings.append(time.perf_counter() - start)
+        p50 = float(np.median(timings))
+        results[size] = (p50 * 1e3, size / p50)
+    return results
+
+
+def main(image_dir: str = None, min_top1: float = 0.95):
+    import json
+
+    with open(os.path.join(fc.MODELS_DIR, "labels.json")) as f:
+        num_classes = len(json.load(f))
+
+    device = torch.device("cpu")
+    fc.configure_threads()
+    print(f"🧵 torch threads: intra-op {torch.get_num_threads()}, inter-op {torch.get_num_interop_threads()}")
+
+    images = load_images(image_dir)
+    batch = to_batch(images)
+    print(f"🐟 {len(images)} {'sample' if image_dir else 'synthetic'} images\n")
+
+    eager = fc.load_eager_model(num_classes, device)
+    reference = top3(eager, batch)
+
+    compare_preprocessing(eager, camera_jpegs())
+
+    failed = []
+    header = "".join(f"   b={s:<3d} ms   img/s" for s in BATCH_SIZES)
+    print(f"{'backend':12s} {'top1':>6s} {'top3':>6s} {'max Δp':>8s}{header}")
+    for backend in fc.FISH_BACKENDS:
+        try:
+            inference_model = fc.build_inference_model(eager, backend, device)
+        except ImportError as e:
+            print(f"{backend:12s} skipped: {e}")
+            continue
+
+        top1, top3_sets, max_diff = parity(reference, top3(inference_model, batch))
+        timings = time_batches(inference_model, batch)
+        cells = "".join(f"  {ms:8.1f} {ips:7.1f}" for ms, ips in timings.values())
+        print(f"{backend:12s} {top1:6.1%} {top3_sets:6.1%} {max_diff:8.4f}{cells}")
+
+        if top1 < min_top1:
+            failed.append(backend)
+
+    if failed:
+        print(f"\n❌ Top-1 agreement with eager below {min_top1:.0%}: {failed}")
+        sys.exit(1)
+    print(f"\n✅ All backends agree with eager on top-1 for >= {min_top1:.0%} of images")
+
+
+if __name__ == "__main__":
+    image_dir = sys.argv[1] if len(sys.argv) > 1 else None
+    min_top1 = float(sys.argv[2]) if len(sys.argv) > 2 else 0.95
+    main(image_dir, min_top1)
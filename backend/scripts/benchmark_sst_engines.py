@@ -0,0 +1,112 @@
+"""
+Accuracy and latency comparison of SST forecasting engines.
+
+Holds out the last `holdout` months of each sample series, forecasts them
+with Prophet and with the NumPy harmonic engine, and reports MAE / RMSE on
+the holdout plus fit + predict latency. Also checks that the harmonic
+engine returns finite output for a series with missing values.
+
+Usage (from backend/):
+    python scripts/benchmark_sst_engines.py [holdout_months]
+"""
+
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add backend root to sys.path so we can import 'services'
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_root = os.path.abspath(os.path.join(current_dir, ".."))
+if backend_root not in sys.path:
+    sys.path.append(backend_root)
+
+from services.sst_numpy import forecast_harmonic
+
+logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+
+
+def synthetic_series(n_months: int, trend: float, amplitude: float, noise: float, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    months = np.arange(n_months)
+    values = 25 + amplitude * np.sin(2 * np.pi * months / 12) + trend * months + rng.normal(0, noise, n_months)
+    return pd.DataFrame({
+        "ds": pd.date_range("1990-01-31", periods=n_months, freq="ME"),
+        "y": values,
+    })
+
+
+def sample_series() -> dict:
+    series = {
+        "tropical_30y": synthetic_series(360, trend=0.002, amplitude=1.5, noise=0.25, seed=1),
+        "temperate_20y": synthetic_series(240, trend=0.003, amplitude=4.0, noise=0.4, seed=2),
+        "noisy_10y": synthetic_series(120, trend=0.0, amplitude=2.0, noise=0.8, seed=3),
+    }
+
+    example_path = os.path.join(backend_root, "SampleData/example_sst_output.csv")
+    if os.path.exists(example_path):
+        example = pd.read_csv(example_path)
+        example["ds"] = pd.to_datetime(example["ds"])
+        series["example_sst_output"] = example.rename(columns={"yhat": "y"})[["ds", "y"]]
+
+    return series
+
+
+def forecast_prophet(train: pd.DataFrame, periods: int) -> pd.DataFrame:
+    from prophet import Prophet
+
+    model = Prophet()
+    model.fit(train)
+    future = model.make_future_dataframe(periods=periods, freq="ME")
+    return model.predict(future)[["ds", "yhat", "yhat_lower", "yhat_upper"]]
+
+
+def evaluate(engine_fn, train: pd.DataFrame, test: pd.DataFrame):
+    start = time.perf_counter()
+    forecast = engine_fn(train, len(test))
+    elapsed = time.perf_counter() - start
+
+    predicted = forecast["yhat"].to_numpy()[-len(test):]
+    errors = predicted - test["y"].to_numpy()
+    return float(np.mean(np.abs(errors))), float(np.sqrt(np.mean(errors ** 2))), elapsed
+
+
+def check_gaps():
+    """Blank values must be skipped by the fit, not turn every forecast into NaN"""
+    series = synthetic_series(120, trend=0.002, amplitude=2.0, noise=0.3, seed=4)
+    series.loc[[0, 17, 18, 60], "y"] = np.nan
+    forecast = forecast_harmonic(series, periods=12, freq="ME")
+    assert len(forecast) == len(series) + 12, "history rows with gaps must stay in the output"
+    assert np.isfinite(forecast[["yhat", "yhat_lower", "yhat_upper"]].to_numpy()).all(), (
+        "harmonic engine returned non-finite values for a series with gaps"
+    )
+    print("✅ Harmonic engine gives finite output for a series with gaps\n")
+
+
+def main(holdout: int = 12):
+    check_gaps()
+
+    start = time.perf_counter()
+    import prophet  # noqa: F401  (import cost reported separately)
+    print(f"📦 prophet import: {(time.perf_counter() - start) * 1e3:.0f} ms\n")
+
+    engines = {
+        "prophet": forecast_prophet,
+        "harmonic": lambda train, periods: forecast_harmonic(train, periods=periods, freq="ME"),
+    }
+
+    print(f"{'series':22s} {'engine':9s} {'MAE':>7s} {'RMSE':>7s} {'latency':>10s}")
+    for name, df in sample_series().items():
+        horizon = min(holdout, len(df) // 4)
+        train, test = df.iloc[:-horizon], df.iloc[-horizon:]
+        for engine_name, engine_fn in engines.items():
+            mae, rmse, elapsed = evaluate(engine_fn, train, test)
+            print(f"{name:22s} {engine_name:9s} {mae:7.3f} {rmse:7.3f} {elapsed * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:2]]
+    main(*args)
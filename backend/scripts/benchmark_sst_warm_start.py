@@ -0,0 +1,91 @@
+"""
+Cold vs warm-start Prophet fit times for append-only SST updates.
+
+Fits a long synthetic monthly series once, then appends one observation at
+a time and refits each step twice: from scratch (cold) and seeded with the
+previous fit's parameters (warm). Reports median fit times and the largest
+forecast difference between the two.
+
+Usage (from backend/):
+    python scripts/benchmark_sst_warm_start.py [n_months] [n_updates]
+"""
+
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Add backend root to sys.path so we can import 'services'
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_root = os.path.abspath(os.path.join(current_dir, ".."))
+if backend_root not in sys.path:
+    sys.path.append(backend_root)
+
+from prophet import Prophet
+from services.sst_predict import extract_warm_start_params
+
+logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+
+
+def synthetic_monthly_sst(n_months: int, seed: int = 0) -> pd.DataFrame:
+    """Seasonal cycle + slow warming trend + noise"""
+    rng = np.random.default_rng(seed)
+    months = np.arange(n_months)
+    values = (
+        26.0
+        + 2.5 * np.sin(2 * np.pi * months / 12)
+        + 0.002 * months
+        + rng.normal(0, 0.3, n_months)
+    )
+    return pd.DataFrame({
+        "ds": pd.date_range("1950-01-01", periods=n_months, freq="MS"),
+        "y": values,
+    })
+
+
+def timed_fit(df: pd.DataFrame, init: dict = None):
+    model = Prophet()
+    start = time.perf_counter()
+    if init is not None:
+        model.fit(df, init=init)
+    else:
+        model.fit(df)
+    return model, time.perf_counter() - start
+
+
+def main(n_months: int = 720, n_updates: int = 5):
+    series = synthetic_monthly_sst(n_months + n_updates)
+    print(f"🌊 {n_months}-month series, {n_updates} append-only updates\n")
+
+    model, _ = timed_fit(series.iloc[:n_months])
+    params = extract_warm_start_params(model)
+
+    cold_times, warm_times, max_diffs = [], [], []
+    for step in range(1, n_updates + 1):
+        history = series.iloc[:n_months + step]
+
+        cold_model, cold_t = timed_fit(history)
+        warm_model, warm_t = timed_fit(history, init=params)
+        params = extract_warm_start_params(warm_model)
+
+        future = cold_model.make_future_dataframe(periods=12, freq="MS")
+        cold_yhat = cold_model.predict(future)["yhat"].to_numpy()
+        warm_yhat = warm_model.predict(future)["yhat"].to_numpy()
+
+        cold_times.append(cold_t)
+        warm_times.append(warm_t)
+        max_diffs.append(float(np.max(np.abs(cold_yhat - warm_yhat))))
+        print(f"  update {step}: cold {cold_t * 1e3:8.1f} ms   warm {warm_t * 1e3:8.1f} ms")
+
+    cold_med, warm_med = np.median(cold_times), np.median(warm_times)
+    print(f"\n✅ median cold fit {cold_med * 1e3:.1f} ms, warm fit {warm_med * 1e3:.1f} ms "
+          f"({cold_med / warm_med:.1f}x faster)")
+    print(f"   max |yhat_cold - yhat_warm| = {max(max_diffs):.4f}")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
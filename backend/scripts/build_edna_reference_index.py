@@ -0,0 +1,39 @@
+"""
+Build the local eDNA reference index from a barcode library FASTA.
+
+Reads the reference (COI / 12S / 16S FASTA, optionally gzipped), builds the
+k-mer index and writes it as memory-mappable .npy arrays to the directory
+the API loads it from (EDNA_REFERENCE_INDEX).
+
+Usage (from backend/):
+    python scripts/build_edna_reference_index.py <reference.fasta[.gz]> [k]
+"""
+
+import os
+import sys
+import time
+
+# Add backend root to sys.path so we can import 'services'
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_root = os.path.abspath(os.path.join(current_dir, ".."))
+if backend_root not in sys.path:
+    sys.path.append(backend_root)
+
+from services import edna_analyzer
+
+
+def main(reference_path: str, k: int = None):
+    start = time.perf_counter()
+    with open(reference_path, "rb") as f:
+        stats = edna_analyzer.build_reference_index(f, k)
+    elapsed = time.perf_counter() - start
+
+    print(f"✅ Built eDNA reference index in {elapsed:.1f}s -> {os.path.abspath(edna_analyzer.EDNA_REFERENCE_INDEX)}")
+    for key, value in stats.items():
+        print(f"  {key:12s} {value}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        raise SystemExit(__doc__)
+    main(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else None)
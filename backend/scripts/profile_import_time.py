@@ -0,0 +1,92 @@
+"""
+Import-time profile of the API entry point, for CI.
+
+Runs `python -X importtime -c "import main"` in a fresh interpreter, prints
+the slowest imports by cumulative time, and fails (exit code 1) if importing
+main.py exceeds the time budget or eagerly pulls in a heavy subsystem that
+should load through services/registry.py.
+
+Usage (from backend/):
+    python scripts/profile_import_time.py [budget_ms] [top_n]
+"""
+
+import os
+import subprocess
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_root = os.path.abspath(os.path.join(current_dir, ".."))
+
+# Top-level packages that must not be imported by `import main`
+LAZY_ONLY_MODULES = [
+    "pandas", "prophet", "cmdstanpy", "sklearn", "joblib",
+    "torch", "torchvision", "timm", "groq", "langchain_chroma",
+    "langchain_huggingface", "chromadb", "boto3",
+]
+
+
+def profile_imports(module: str = "main"):
+    """
+    Returns:
+        List of (name, depth, self_us, cumulative_us) in import order
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=backend_root, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        print(result.stderr[-2000:])
+        raise SystemExit(f"❌ import {module} failed")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        # One leading space, then two more per nesting level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def direct_imports(rows, module: str = "main"):
+    """Modules imported directly by `module` (children are listed before their parent)"""
+    end = max(i for i, row in enumerate(rows) if row[0] == module and row[1] == 0)
+    children = []
+    for name, depth, _, cumulative in reversed(rows[:end]):
+        if depth == 0:
+            break
+        if depth == 1:
+            children.append((name, cumulative))
+    return children
+
+
+def main(budget_ms: int = 1500, top_n: int = 15):
+    rows = profile_imports("main")
+    total_ms = next(cumulative for name, depth, _, cumulative in reversed(rows)
+                    if name == "main" and depth == 0) / 1000
+
+    print(f"⏱️  import main: {total_ms:.0f} ms (budget {budget_ms} ms)\n")
+    print(f"{'cumulative':>12s}  imported by main")
+    for name, cumulative in sorted(direct_imports(rows), key=lambda item: -item[1])[:top_n]:
+        print(f"{cumulative / 1000:9.1f} ms  {name}")
+
+    imported = {name.split(".")[0] for name, _, _, _ in rows}
+    eager = [m for m in LAZY_ONLY_MODULES if m in imported]
+
+    failed = False
+    if eager:
+        print(f"\n❌ Eagerly imported heavy modules: {eager}")
+        failed = True
+    if total_ms > budget_ms:
+        print(f"\n❌ import main took {total_ms:.0f} ms, over the {budget_ms} ms budget")
+        failed = True
+
+    if failed:
+        sys.exit(1)
+    print("\n✅ Import profile within budget, no heavy modules loaded eagerly")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
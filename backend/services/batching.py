@@ -0,0 +1,94 @@
+"""
+Micro-batching for concurrent single-item requests.
+
+Concurrent callers submit one item each; the batcher collects them for at
+most `max_wait_ms` (or until `max_batch_size` items are queued), runs one
+batched call in a worker thread, and fans the results back out to the
+awaiting callers.
+"""
+
+import asyncio
+from typing import Any, Callable, List, Optional
+
+
+class MicroBatcher:
+    """Coalesces concurrent awaitable submissions into batched calls"""
+
+    def __init__(self, batch_fn: Callable[[List[Any]], List[Any]],
+                 max_batch_size: int = 64, max_wait_ms: float = 2.0,
+                 executor=None):
+        """
+        Args:
+            batch_fn: Blocking function mapping a list of items to a list of
+                results of the same length and order
+            max_batch_size: Flush as soon as this many items are queued
+            max_wait_ms: Longest time the first queued item waits for company
+            executor: Executor for batch_fn (None = the loop's default pool)
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.executor = executor
+
+        self._pending = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+        # Monitoring counters
+        self.batches_run = 0
+        self.items_processed = 0
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one item and wait for its result"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self._pending:
+            batch = self._pending[:self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size:]
+            asyncio.get_running_loop().create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch):
+        items = [item for item, _ in batch]
+        loop = asyncio.get_running_loop()
+
+        try:
+            results = await loop.run_in_executor(self.executor, self.batch_fn, items)
+            if len(results) != len(items):
+                raise RuntimeError(
+                    f"Batch function returned {len(results)} results for {len(items)} items"
+                )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.batches_run += 1
+        self.items_processed += len(items)
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "batches_run": self.batches_run,
+            "items_processed": self.items_processed,
+            "mean_batch_size": round(self.items_processed / self.batches_run, 2) if self.batches_run else 0,
+            "pending": len(self._pending),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+        }
@@ -0,0 +1,127 @@
+"""
+Gridded chlorophyll predictions over depth × salinity × pH.
+
+The grid is generated lazily in blocks of whole depth slices, so only one
+block of feature rows exists at a time. Results are returned as a float32
+NPY payload (shape = (n_depth, n_salinity, n_ph)) plus a small JSON header.
+Recently requested grids are kept in an LRU cache keyed by their axes and
+bounded by the total size of the cached payloads.
+"""
+
+import io
+import math
+import os
+from typing import Dict, Iterator, Tuple
+
+import numpy as np
+
+from services.lru_cache import LRUCache
+from services.predict import predict_chlorophyll_batch
+
+# Feature rows evaluated per block
+GRID_BLOCK_POINTS = int(os.getenv("CHLOROPHYLL_GRID_BLOCK_POINTS", "250000"))
+
+# Refuse grids larger than this many points
+GRID_MAX_POINTS = int(os.getenv("CHLOROPHYLL_GRID_MAX_POINTS", "20000000"))
+
+# Total size of recent grid payloads kept in memory
+GRID_CACHE_MB = float(os.getenv("CHLOROPHYLL_GRID_CACHE_MB", "256"))
+
+AXIS_ORDER = ["depth", "salinity", "ph"]
+
+# (header, payload) pairs sized by their NPY payload
+_grid_cache = LRUCache(max_bytes=int(GRID_CACHE_MB * 1e6), sizeof=lambda entry: len(entry[1]))
+
+
+def axis_size(start: float, stop: float, step: float) -> int:
+    """Number of values from start to stop (inclusive) by step, without allocating them"""
+    if not all(math.isfinite(v) for v in (start, stop, step)):
+        raise ValueError(f"Axis bounds and step must be finite, got ({start}, {stop}, {step})")
+    if step <= 0:
+        raise ValueError(f"Axis step must be positive, got {step}")
+    if stop < start:
+        raise ValueError(f"Axis stop ({stop}) must be >= start ({start})")
+
+    span = (stop - start) / step
+    if not math.isfinite(span) or span >= GRID_MAX_POINTS:
+        raise ValueError(f"Axis ({start}, {stop}, {step}) has more than {GRID_MAX_POINTS} values")
+    return int(math.floor(span + 1e-9)) + 1
+
+
+def axis_values(start: float, stop: float, step: float) -> np.ndarray:
+    """Evenly spaced values from start to stop (inclusive) by step"""
+    return start + step * np.arange(axis_size(start, stop, step), dtype=np.float64)
+
+
+def iter_grid_blocks(depths: np.ndarray, salinities: np.ndarray, phs: np.ndarray,
+                     block_points: int = GRID_BLOCK_POINTS) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Yield (first_depth_index, feature_block) pairs covering the grid.
+
+    Each block holds whole depth slices in C order (depth, salinity, ph),
+    so predictions reshape straight into the output cube.
+    """
+    plane = np.stack(np.meshgrid(salinities, phs, indexing="ij"), axis=-1).reshape(-1, 2)
+    depths_per_block = max(1, block_points // len(plane))
+
+    for start in range(0, len(depths), depths_per_block):
+        block_depths = depths[start:start + depths_per_block]
+        X = np.empty((len(block_depths) * len(plane), 3), dtype=np.float64)
+        X[:, 0] = np.repeat(block_depths, len(plane))
+        X[:, 1:] = np.tile(plane, (len(block_depths), 1))
+        yield start, X
+
+
+def predict_chlorophyll_grid(axes: Dict[str, Tuple[float, float, float]]) -> Tuple[dict, bytes]:
+    """
+    Evaluate the chlorophyll model over a depth × salinity × pH grid.
+
+    Args:
+        axes: {"depth": (start, stop, step), "salinity": (...), "ph": (...)}
+
+    Returns:
+        (header, npy_bytes) where header describes shape, dtype and axes
+    """
+    key = tuple(tuple(float(v) for v in axes[name]) for name in AXIS_ORDER)
+
+    cached = _grid_cache.get(key)
+    if cached is not None:
+        header, payload = cached
+        return {**header, "cached": True}, payload
+
+    # Size check before any axis or grid array is allocated
+    shape = tuple(axis_size(*axes[name]) for name in AXIS_ORDER)
+    n_points = math.prod(shape)
+    if n_points > GRID_MAX_POINTS:
+        raise ValueError(f"Grid has {n_points} points; limit is {GRID_MAX_POINTS}")
+
+    values = [axis_values(*axes[name]) for name in AXIS_ORDER]
+
+    depths, salinities, phs = values
+    grid = np.empty(shape, dtype=np.float32)
+    for start, X in iter_grid_blocks(depths, salinities, phs):
+        predictions = predict_chlorophyll_batch(X, use_cache=False)
+        block = predictions.reshape(-1, shape[1], shape[2])
+        grid[start:start + block.shape[0]] = block
+
+    buffer = io.BytesIO()
+    np.save(buffer, grid, allow_pickle=False)
+    payload = buffer.getvalue()
+
+    header = {
+        "format": "npy",
+        "dtype": "float32",
+        "shape": list(shape),
+        "order": AXIS_ORDER,
+        "axes": {
+            name: {"start": axis[0], "stop": float(v[-1]), "step": axis[2], "size": len(v)}
+            for name, axis, v in zip(AXIS_ORDER, key, values)
+        },
+        "min": float(grid.min()),
+        "max": float(grid.max()),
+        "bytes": len(payload),
+    }
+
+    _grid_cache.put(key, (header, payload))
+
+    return {**header, "cached": False}, payload
@@ -3,14 +3,42 @@ eDNA Analysis Service with GenAI Integration
 Analyzes environmental DNA sequences and provides AI-powered species insights
 """
 
+import hashlib
 import re
-from typing import Dict, List, Optional
+import shutil
+import threading
+from typing import BinaryIO, Dict, Iterable, List, Optional, Tuple, Union
 from groq import Groq
 import os
 from dotenv import load_dotenv
 
+import numpy as np
+
+from services.kmer_index import EDNA_KMER_SIZE, KmerReferenceIndex
+from services.read_qc import ReadQC
+from services.packed_sequences import PackedSequences
+from services.sequence_io import iter_packed, iter_records
+
 load_dotenv()
 
+# Records per upload sent to the LLM for identification when no reference
+# index is available; the rest are counted in the run summary as not analyzed (0 = no limit)
+EDNA_MAX_AI_RECORDS = int(os.getenv("EDNA_MAX_AI_RECORDS", "20"))
+
+# Local reference index (built from a barcode library via /api/v1/edna/reference
+# or scripts/build_edna_reference_index.py); when present, reads are identified
+# locally and the LLM only writes species profiles for detected species
+EDNA_REFERENCE_INDEX = os.getenv(
+    "EDNA_REFERENCE_INDEX", os.path.join(os.path.dirname(__file__), "../models/edna_reference_index")
+)
+EDNA_MIN_KMER_SCORE = float(os.getenv("EDNA_MIN_KMER_SCORE", "0.5"))   # fraction of read k-mers matched
+EDNA_ASSIGN_BATCH_READS = int(os.getenv("EDNA_ASSIGN_BATCH_READS", "4096"))
+EDNA_MAX_ENRICHED_SPECIES = int(os.getenv("EDNA_MAX_ENRICHED_SPECIES", "10"))
+
+# Also collapse reads that are the reverse complement of one another
+# (amplicons sequenced from both strands)
+EDNA_DEREPLICATE_REVCOMP = os.getenv("EDNA_DEREPLICATE_REVCOMP", "true").lower() == "true"
+
 # Initialize Groq client
 groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
 
@@ -28,42 +56,13 @@ class eDNAAnalyzer:
             file_content: Raw file content from uploaded FASTA/FASTQ file
             
         Returns:
-            Dict with sequence_id and sequence
+            Dict with sequence_id and sequence of the first record
+            (use services.sequence_io.iter_records for every record)
         """
-        lines = file_content.strip().split('\n')
-        
-        # FASTA format starts with >
-        if lines[0].startswith('>'):
-            sequence_id = lines[0][1:].strip()
-            sequence = ''.join(lines[1:]).upper().replace(' ', '')
-            return {
-                "sequence_id": sequence_id,
-                "sequence": sequence,
-                "length": len(sequence),
-                "format": "FASTA"
-            }
-        
-        # FASTQ format (4 lines per sequence)
-        elif lines[0].startswith('@'):
-            sequence_id = lines[0][1:].strip()
-            sequence = lines[1].upper().replace(' ', '')
-            return {
-                "sequence_id": sequence_id,
-                "sequence": sequence,
-                "length": len(sequence),
-                "format": "FASTQ",
-                "quality_scores": lines[3] if len(lines) > 3 else None
-            }
-        
-        else:
-            # Raw sequence without header
-            sequence = ''.join(lines).upper().replace(' ', '')
-            return {
-                "sequence_id": "Unknown",
-                "sequence": sequence,
-                "length": len(sequence),
-                "format": "RAW"
-            }
+        record = next(iter_records(file_content), None)
+        if record is None:
+            return {"sequence_id": "Unknown", "sequence": "", "length": 0, "format": "RAW"}
+        return record.to_dict()
     
     def analyze_sequence_with_ai(self, sequence_data: Dict) -> Dict:
         """
@@ -153,6 +152,89 @@ Respond ONLY with valid JSON, no additional text."""
             # Fallback to mock data if AI fails
             return self._get_mock_analysis(sequence_data)
     
+    def enrich_species_with_ai(self, detection: Dict) -> Dict:
+        """
+        Species profile for a taxon identified by the local reference index.
+        
+        Args:
+            detection: Per-taxon summary from identify_with_index
+            
+        Returns:
+            Same keys as analyze_sequence_with_ai; identity and confidence
+            come from the index, not from the LLM
+        """
+        prompt = f"""You are a marine biologist. The following taxon was detected in an environmental DNA sample by matching {detection['reads']} reads against a reference barcode library:
+
+Taxon: {detection['taxon']}
+
+Describe this species. Format your response as JSON with these exact keys:
+{{
+    "species_common": "...",
+    "genetic_markers": ["marker1", "marker2"],
+    "invasive_status": "native" or "invasive" or "unknown",
+    "characteristics": {{
+        "habitat": "...",
+        "behavior": "...",
+        "diet": "...",
+        "conservation_status": "..."
+    }},
+    "ecological_role": "...",
+    "interesting_facts": ["fact1", "fact2"]
+}}
+
+Respond ONLY with valid JSON, no additional text."""
+
+        try:
+            response = groq_client.chat.completions.create(
+                model="llama-3.3-70b-versatile",
+                messages=[
+                    {
+                        "role": "system",
+                        "content": "You are an expert marine biologist. Provide accurate, scientific species profiles. Always respond in valid JSON format."
+                    },
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ],
+                temperature=0.3,
+                max_tokens=1500
+            )
+            
+            import json
+            ai_response = response.choices[0].message.content
+            json_match = re.search(r'\{.*\}', ai_response, re.DOTALL)
+            profile = json.loads(json_match.group() if json_match else ai_response)
+        except Exception as e:
+            print(f"AI Enrichment Error: {e}")
+            profile = {}
+        
+        return self._detection_analysis(detection, profile)
+    
+    def _detection_analysis(self, detection: Dict, profile: Optional[Dict] = None) -> Dict:
+        """Analysis dict for an index detection, with an optional LLM species profile"""
+        profile = profile or {}
+        analysis = {
+            "species_common": detection["taxon"],
+            "genetic_markers": [],
+            "invasive_status": "unknown",
+            "characteristics": {},
+            "ecological_role": "Unknown",
+            "interesting_facts": []
+        }
+        analysis.update(profile)
+        analysis.update({
+            "species_scientific": detection["taxon"],
+            "confidence": round(detection["mean_score"] * 100, 1),
+            "identification": dict(detection, method="kmer_index", enriched=bool(profile)),
+            "sequence_metadata": {
+                "sequence_id": detection["example_read"],
+                "length": detection["example_length"],
+                "format": detection["format"]
+            }
+        })
+        return analysis
+    
     def chat_about_species(self, species_data: Dict, user_question: str) -> str:
         """
         Interactive chatbot for asking questions about the analyzed species
@@ -253,27 +335,271 @@ Answer questions clearly, scientifically, and in a friendly manner. If asked abo
 # Global analyzer instance
 analyzer = eDNAAnalyzer()
 
+_reference_index = None
+_reference_lock = threading.Lock()
+
+
+def get_reference_index() -> Optional[KmerReferenceIndex]:
+    """Memory-mapped reference index at EDNA_REFERENCE_INDEX, or None if none has been built"""
+    global _reference_index
+    if _reference_index is None and KmerReferenceIndex.exists(EDNA_REFERENCE_INDEX):
+        with _reference_lock:
+            if _reference_index is None:
+                _reference_index = KmerReferenceIndex.load(EDNA_REFERENCE_INDEX)
+                print(f"✅ Loaded eDNA reference index: {_reference_index.stats()}")
+    return _reference_index
+
+
+def build_reference_index(source: Union[str, bytes, BinaryIO], k: int = None) -> Dict:
+    """
+    Build the reference index from a barcode library FASTA and make it active.
+    
+    Args:
+        source: Reference FASTA (optionally gzipped); headers name the taxon,
+            e.g. ">MN123|Thunnus_albacares" or a ";"-separated lineage
+        k: k-mer size (default EDNA_KMER_SIZE)
+        
+    Returns:
+        Index statistics
+    """
+    global _reference_index
+    index = KmerReferenceIndex.build(iter_packed(source), k=k or EDNA_KMER_SIZE)
+    
+    # Write next to the live index and swap directories, so readers of the
+    # old memory-mapped files are never left with truncated arrays
+    staging, retired = EDNA_REFERENCE_INDEX + ".building", EDNA_REFERENCE_INDEX + ".old"
+    shutil.rmtree(staging, ignore_errors=True)
+    index.save(staging)
+    with _reference_lock:
+        shutil.rmtree(retired, ignore_errors=True)
+        if os.path.exists(EDNA_REFERENCE_INDEX):
+            os.replace(EDNA_REFERENCE_INDEX, retired)
+        os.replace(staging, EDNA_REFERENCE_INDEX)
+        _reference_index = KmerReferenceIndex.load(EDNA_REFERENCE_INDEX)
+    shutil.rmtree(retired, ignore_errors=True)
+    
+    return _reference_index.stats()
+
+
+class Dereplicator:
+    """
+    Collapses identical reads into unique sequences with abundance counts.
+    
+    Reads are keyed by a 128-bit BLAKE2 digest of their packed bases, so
+    memory grows with the number of unique sequences, not with read length.
+    With reverse_complement=True a read and its reverse complement share one
+    key (the smaller of the two strands' packed keys). The first read seen
+    is kept as the representative, in its original orientation; unique
+    reads stay 2-bit packed.
+    """
+    
+    def __init__(self, reverse_complement: bool = EDNA_DEREPLICATE_REVCOMP):
+        self.reverse_complement = reverse_complement
+        self._positions = {}
+        self._parts: List[PackedSequences] = []
+        self.abundances: List[int] = []
+        self.reads = 0
+    
+    def add_batch(self, batch: PackedSequences):
+        self.reads += len(batch)
+        keys = batch.keys()
+        if self.reverse_complement:
+            keys = [min(forward, reverse) for forward, reverse in zip(keys, batch.reverse_complement().keys())]
+        
+        new = []
+        for i, key in enumerate(keys):
+            digest = hashlib.blake2b(key, digest_size=16).digest()
+            position = self._positions.get(digest)
+            if position is None:
+                self._positions[digest] = len(self.abundances)
+                self.abundances.append(1)
+                new.append(i)
+            else:
+                self.abundances[position] += 1
+        if new:
+            self._parts.append(batch.take(new))
+    
+    def unique(self) -> Tuple[PackedSequences, np.ndarray]:
+        """
+        Returns:
+            (representative reads, abundance per read), most abundant first
+        """
+        abundances = np.asarray(self.abundances, dtype=np.int64)
+        order = np.argsort(-abundances, kind="stable")
+        return PackedSequences.concatenate(self._parts).take(order), abundances[order]
+    
+    def stats(self) -> Dict:
+        return {
+            "unique_sequences": len(self.abundances),
+            "dereplication_ratio": round(self.reads / len(self.abundances), 2) if self.abundances else 0.0,
+            "reverse_complement": self.reverse_complement
+        }
+
+
+def dereplicate(batches: Iterable[PackedSequences],
+                reverse_complement: bool = EDNA_DEREPLICATE_REVCOMP) -> Dereplicator:
+    """Collapse a stream of packed read batches (see Dereplicator)"""
+    dereplicator = Dereplicator(reverse_complement)
+    for batch in batches:
+        dereplicator.add_batch(batch)
+    return dereplicator
 
-def analyze_edna_file(file_content: str) -> Dict:
+
+def identify_with_index(sequences: PackedSequences, index: KmerReferenceIndex,
+                        min_score: float = EDNA_MIN_KMER_SCORE,
+                        abundances: Optional[np.ndarray] = None) -> Dict:
+    """
+    Assign every read to its best-matching reference taxon, EDNA_ASSIGN_BATCH_READS at a time.
+    
+    Args:
+        sequences: Packed reads, or unique sequences from dereplicate()
+        abundances: Reads represented by each record (default 1 each);
+            read counts in the result are weighted by it
+    
+    Returns:
+        {
+            "detections": [per-taxon {"taxon", "reads", "unique_sequences", "mean_score",
+                           "ambiguous_reads", "example_read", "example_length", "format"},
+                           most reads first],
+            "assigned": int, "unassigned": int, "ambiguous": int (reads)
+        }
+    """
+    n_taxa = len(index.taxa)
+    reads = np.zeros(n_taxa, dtype=np.int64)
+    unique_sequences = np.zeros(n_taxa, dtype=np.int64)
+    score_sums = np.zeros(n_taxa, dtype=np.float64)
+    ambiguous_reads = np.zeros(n_taxa, dtype=np.int64)
+    examples = {}
+    total = len(sequences)
+    
+    for start in range(0, total, EDNA_ASSIGN_BATCH_READS):
+        batch = sequences.take(np.arange(start, min(start + EDNA_ASSIGN_BATCH_READS, total)))
+        weights = np.ones(len(batch), dtype=np.int64) if abundances is None else \
+            np.asarray(abundances[start:start + len(batch)], dtype=np.int64)
+        
+        result = index.assign(batch)
+        accepted = np.flatnonzero((result["taxon"] >= 0) & (result["score"] >= min_score))
+        taxa = result["taxon"][accepted]
+        accepted_weights = weights[accepted]
+        
+        reads += np.bincount(taxa, weights=accepted_weights, minlength=n_taxa).astype(np.int64)
+        unique_sequences += np.bincount(taxa, minlength=n_taxa)
+        score_sums += np.bincount(taxa, weights=result["score"][accepted] * accepted_weights, minlength=n_taxa)
+        ambiguous_reads += np.bincount(
+            taxa, weights=result["ambiguous"][accepted] * accepted_weights, minlength=n_taxa
+        ).astype(np.int64)
+        
+        # First read of each newly seen taxon is kept as its example
+        seen, first = np.unique(taxa, return_index=True)
+        for taxon, i in zip(seen.tolist(), first.tolist()):
+            if taxon not in examples:
+                read = int(accepted[i])
+                examples[taxon] = (batch.ids[read] if batch.ids is not None else None,
+                                   int(batch.lengths[read]), batch.format)
+    
+    detections = [
+        {
+            "taxon": index.taxa[taxon],
+            "reads": int(reads[taxon]),
+            "unique_sequences": int(unique_sequences[taxon]),
+            "mean_score": round(float(score_sums[taxon] / reads[taxon]), 4),
+            "ambiguous_reads": int(ambiguous_reads[taxon]),
+            "example_read": examples[taxon][0],
+            "example_length": examples[taxon][1],
+            "format": examples[taxon][2]
+        }
+        for taxon in np.argsort(-reads, kind="stable").tolist() if reads[taxon] > 0
+    ]
+    assigned = int(reads.sum())
+    total_reads = total if abundances is None else int(np.sum(abundances[:total]))
+    
+    return {
+        "detections": detections,
+        "assigned": assigned,
+        "unassigned": total_reads - assigned,
+        "ambiguous": int(ambiguous_reads.sum())
+    }
+
+
+def analyze_edna_file(source: Union[str, bytes, BinaryIO], qc: bool = True) -> Dict:
     """
     Main function to analyze eDNA file
     
+    Every record is streamed from the upload. FASTQ reads are quality
+    trimmed and filtered (services/read_qc.py) and identical reads are
+    dereplicated, so identification runs once per unique sequence and
+    abundance counts carry through to the results. With a reference index
+    (EDNA_REFERENCE_INDEX) unique sequences are identified locally and the
+    LLM only profiles the detected species, one call per species. Without
+    one, the EDNA_MAX_AI_RECORDS most abundant unique sequences are
+    identified by the LLM.
+    
     Args:
-        file_content: Raw content from uploaded FASTA/FASTQ file
+        source: Uploaded FASTA/FASTQ file (optionally gzipped) as text, bytes
+            or a binary file object
+        qc: Apply FASTQ quality control before identification
         
     Returns:
-        Complete analysis results
+        {
+            "analyses": [analysis per detected species (index) or per unique sequence (LLM)],
+            "run": {"records", "unique_sequences", "dereplication_ratio", "packed_mb", "identification",
+                    "format", "total_bases", "min_length", "mean_length", "max_length",
+                    "qc": {"reads_in", "reads_passed", "mean_quality_in", ...} (FASTQ), ...}
+        }
     """
-    # Parse sequence
-    sequence_data = analyzer.parse_fasta_sequence(file_content)
+    run = {"records": 0, "total_bases": 0, "min_length": None, "max_length": 0, "format": None}
+    
+    def counted(batches):
+        for batch in batches:
+            if len(batch):
+                run["records"] += len(batch)
+                run["total_bases"] += batch.total_bases
+                shortest, longest = int(batch.lengths.min()), int(batch.lengths.max())
+                run["min_length"] = shortest if run["min_length"] is None else min(run["min_length"], shortest)
+                run["max_length"] = max(run["max_length"], longest)
+                run["format"] = batch.format
+            yield batch
     
-    # Analyze with AI
-    analysis = analyzer.analyze_sequence_with_ai(sequence_data)
+    batches = counted(iter_packed(source))
+    read_qc = ReadQC() if qc else None
+    if read_qc is not None:
+        batches = read_qc.filter(batches)
+    
+    dereplicated = dereplicate(batches)
+    uniques, abundances = dereplicated.unique()
+    run.update(dereplicated.stats(), packed_mb=round(uniques.nbytes / 1e6, 3))
+    index = get_reference_index()
+    
+    if index is not None:
+        identified = identify_with_index(uniques, index, abundances=abundances)
+        detections = identified.pop("detections")
+        
+        # LLM only for narrative profiles of species actually detected
+        analyses = [
+            analyzer.enrich_species_with_ai(detection) if i < EDNA_MAX_ENRICHED_SPECIES
+            else analyzer._detection_analysis(detection)
+            for i, detection in enumerate(detections)
+        ]
+        run.update(identified, identification="kmer_index", species_detected=len(detections))
+    else:
+        limit = len(uniques) if EDNA_MAX_AI_RECORDS <= 0 else EDNA_MAX_AI_RECORDS
+        analyses = []
+        for i, abundance in enumerate(abundances[:limit].tolist()):
+            # Analyze with AI
+            analysis = analyzer.analyze_sequence_with_ai(uniques.to_dict(i))
+            analysis["abundance"] = abundance
+            analyses.append(analysis)
+        run.update(identification="llm", analyzed=len(analyses), not_analyzed=len(uniques) - len(analyses),
+                   reads_analyzed=int(abundances[:limit].sum()))
     
     # Reset conversation for new analysis
     analyzer.reset_conversation()
     
-    return analysis
+    if read_qc is not None and read_qc.reads_in:
+        run["qc"] = read_qc.stats()
+    run["min_length"] = run["min_length"] or 0
+    run["mean_length"] = round(run["total_bases"] / run["records"], 1) if run["records"] else 0
+    return {"analyses": analyses, "run": run}
 
 
 def chat_with_species(species_data: Dict, question: str) -> Dict:
@@ -0,0 +1,95 @@
+"""
+Bounded executors for blocking work called from async endpoints.
+
+Two workload classes, each with its own pool so one cannot starve the other:
+
+- cpu: model inference and fits (RandomForest, EfficientNet, Prophet,
+  pandas analyses). NumPy, scikit-learn, torch and cmdstan release the GIL
+  for their heavy parts, and in-process model caches stay shared, so this
+  is a thread pool. Multi-station SST fits additionally fan out to their
+  own process pool (see services/sst_predict.py).
+- llm: outbound Groq / Bedrock / RAG calls that mostly wait on the network.
+
+Pool sizes are configured with CPU_POOL_WORKERS and LLM_POOL_WORKERS.
+"""
+
+import asyncio
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+CPU_POOL_WORKERS = int(os.getenv("CPU_POOL_WORKERS", str(os.cpu_count() or 4)))
+LLM_POOL_WORKERS = int(os.getenv("LLM_POOL_WORKERS", "8"))
+
+
+class WorkloadPool:
+    """Thread pool plus in-flight / latency counters for one workload class"""
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max(1, max_workers)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.busy_seconds = 0.0
+
+    def _call(self, fn):
+        start = time.perf_counter()
+        try:
+            return fn()
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+                self.busy_seconds += time.perf_counter() - start
+
+    async def run(self, fn, *args, **kwargs):
+        """Await fn(*args, **kwargs) on this pool without blocking the event loop"""
+        with self._lock:
+            self.submitted += 1
+            self.in_flight += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, self._call, functools.partial(fn, *args, **kwargs)
+        )
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "in_flight": self.in_flight,
+                # queued = waiting for a free worker
+                "queued": max(0, self.in_flight - self.max_workers),
+                "busy_seconds": round(self.busy_seconds, 3),
+            }
+
+
+cpu_pool = WorkloadPool("cpu", CPU_POOL_WORKERS)
+llm_pool = WorkloadPool("llm", LLM_POOL_WORKERS)
+
+
+async def run_cpu(fn, *args, **kwargs):
+    """Run CPU-bound model work on the cpu pool"""
+    return await cpu_pool.run(fn, *args, **kwargs)
+
+
+async def run_llm(fn, *args, **kwargs):
+    """Run a blocking LLM / agent call on the llm pool"""
+    return await llm_pool.run(fn, *args, **kwargs)
+
+
+def get_executor_stats() -> dict:
+    return {"cpu": cpu_pool.stats(), "llm": llm_pool.stats()}
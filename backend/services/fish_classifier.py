@@ -1,71 +1,305 @@
 import torch
 import torch.nn as nn
 from torchvision import transforms
-from PIL import Image
+from PIL import Image, ImageSequence
+import io
 import json
 import os
+import time
 import timm
+import zipfile
+import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Iterable, List, Optional
+
+from services.batching import MicroBatcher
+from services.executors import cpu_pool
+from services.image_cache import PerceptualHashCache, perceptual_hash
 
 # Global variables for model and labels (loaded once at startup)
 model = None
 labels = None
 device = None
 
-def load_model_and_labels():
+# Images per forward pass for batch classification
+FISH_BATCH_SIZE = int(os.getenv("FISH_BATCH_SIZE", "32"))
+
+# Threads decoding uploaded images in parallel (PIL releases the GIL while decoding)
+FISH_DECODE_WORKERS = int(os.getenv("FISH_DECODE_WORKERS", "4"))
+
+# Coalescing of concurrent single-image requests into shared forward passes
+FISH_MICROBATCH_MAX_SIZE = int(os.getenv("FISH_MICROBATCH_MAX_SIZE", "16"))
+FISH_MICROBATCH_MAX_WAIT_MS = float(os.getenv("FISH_MICROBATCH_MAX_WAIT_MS", "5"))
+
+# Near-duplicate result cache (0 entries = disabled); distance is in differing hash bits out of 64
+FISH_HASH_CACHE_SIZE = int(os.getenv("FISH_HASH_CACHE_SIZE", "2048"))
+FISH_HASH_MAX_DISTANCE = int(os.getenv("FISH_HASH_MAX_DISTANCE", "4"))
+
+# Frame-sequence (video) classification:
+#   window        - frames whose probabilities are averaged into one smoothed detection
+#   skip distance - frames within this many hash bits of the last classified frame reuse
+#                   its prediction instead of running the model (negative = never skip)
+#   chunk         - frames decoded and classified per step, i.e. per emitted batch of results
+FISH_STREAM_WINDOW = int(os.getenv("FISH_STREAM_WINDOW", "8"))
+FISH_STREAM_SKIP_DISTANCE = int(os.getenv("FISH_STREAM_SKIP_DISTANCE", "6"))
+FISH_STREAM_CHUNK_FRAMES = int(os.getenv("FISH_STREAM_CHUNK_FRAMES", "16"))
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".bmp", ".tif", ".tiff", ".gif")
+
+# Inference backend for CPU nodes:
+#   "eager"       - PyTorch fp32 (default)
+#   "torchscript" - traced, frozen and optimized for inference
+#   "int8"        - dynamic int8 quantization (Linear layers)
+#   "onnx"        - ONNX Runtime (requires the onnxruntime package)
+FISH_INFERENCE_BACKEND = os.getenv("FISH_INFERENCE_BACKEND", "eager")
+FISH_BACKENDS = ("eager", "torchscript", "int8", "onnx")
+
+# Explicit CPU threading (0 = leave the runtime default)
+FISH_INTRA_OP_THREADS = int(os.getenv("FISH_INTRA_OP_THREADS", "0"))
+FISH_INTER_OP_THREADS = int(os.getenv("FISH_INTER_OP_THREADS", "0"))
+
+# Dummy forward passes at load, so the first request doesn't pay for lazy initialization
+FISH_WARMUP_RUNS = int(os.getenv("FISH_WARMUP_RUNS", "2"))
+
+MODELS_DIR = os.path.join(os.path.dirname(__file__), '../models')
+MODEL_PATH = os.path.join(MODELS_DIR, 'fish_classifier.pth')
+FISH_ONNX_PATH = os.getenv("FISH_ONNX_PATH", os.path.join(MODELS_DIR, 'fish_classifier.onnx'))
+INPUT_SIZE = 224
+
+_decode_pool = ThreadPoolExecutor(max_workers=FISH_DECODE_WORKERS, thread_name_prefix="fish-decode")
+
+# Entries are {"classification": {...}, "agent_result": {...} (once enriched)}
+fish_result_cache = PerceptualHashCache(FISH_HASH_CACHE_SIZE, FISH_HASH_MAX_DISTANCE)
+
+
+def load_model_and_labels(backend: str = None):
     """
     Load the fish classifier model and labels once at application startup.
     This prevents reloading on every prediction request.
+    
+    Args:
+        backend: Inference backend (default FISH_INFERENCE_BACKEND)
     """
     global model, labels, device
     
+    backend = backend or FISH_INFERENCE_BACKEND
+    if backend not in FISH_BACKENDS:
+        raise ValueError(f"Unknown fish inference backend '{backend}'. Choose one of: {list(FISH_BACKENDS)}")
+    
     # Set device
     device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    configure_threads()
     
     # Load labels
-    labels_path = os.path.join(os.path.dirname(__file__), '../models/labels.json')
+    labels_path = os.path.join(MODELS_DIR, 'labels.json')
     with open(labels_path, 'r') as f:
         labels = json.load(f)
     
-    # Load model
-    model_path = os.path.join(os.path.dirname(__file__), '../models/fish_classifier.pth')
+    num_classes = len(labels)
+    eager_model = load_eager_model(num_classes, device)
+    model = build_inference_model(eager_model, backend, device)
+    warm_up(model, device)
     
+    print(f"✅ Fish classifier model loaded successfully on {device} (backend: {backend})")
+    print(f"✅ Loaded {num_classes} fish species labels")
+    
+    return model, labels, device
+
+
+def configure_threads():
+    """Apply FISH_INTRA_OP_THREADS / FISH_INTER_OP_THREADS to PyTorch"""
+    if FISH_INTRA_OP_THREADS > 0:
+        torch.set_num_threads(FISH_INTRA_OP_THREADS)
+    if FISH_INTER_OP_THREADS > 0:
+        try:
+            torch.set_num_interop_threads(FISH_INTER_OP_THREADS)
+        except RuntimeError as e:
+            # Only settable before the first inter-op parallel work in the process
+            print(f"⚠️ Could not set inter-op threads: {e}")
+
+
+def load_eager_model(num_classes: int, device) -> nn.Module:
+    """fp32 PyTorch model with the trained weights, in eval mode"""
     # Create model architecture (using EfficientNet-B0 as base)
     # Adjust this if your model uses a different architecture
-    num_classes = len(labels)
-    model = timm.create_model('efficientnet_b0', pretrained=False, num_classes=num_classes)
+    eager_model = timm.create_model('efficientnet_b0', pretrained=False, num_classes=num_classes)
     
     # Load trained weights
-    model.load_state_dict(torch.load(model_path, map_location=device))
-    model = model.to(device)
-    model.eval()
+    eager_model.load_state_dict(torch.load(MODEL_PATH, map_location=device))
+    eager_model = eager_model.to(device)
+    eager_model.eval()
+    return eager_model
+
+
+def build_inference_model(eager_model: nn.Module, backend: str, device):
+    """
+    Wrap the eager model in the requested backend.
+    Every backend maps a (N, 3, 224, 224) float tensor to (N, num_classes) logits.
+    """
+    if backend == "eager":
+        return eager_model
     
-    print(f"✅ Fish classifier model loaded successfully on {device}")
-    print(f"✅ Loaded {num_classes} fish species labels")
+    if device.type != "cpu":
+        print(f"⚠️ Backend '{backend}' targets CPU nodes; using eager on {device}")
+        return eager_model
     
-    return model, labels, device
+    example = torch.zeros(1, 3, INPUT_SIZE, INPUT_SIZE)
+    
+    if backend == "torchscript":
+        with torch.no_grad():
+            traced = torch.jit.trace(eager_model, example)
+            return torch.jit.optimize_for_inference(torch.jit.freeze(traced))
+    
+    if backend == "int8":
+        # Dynamic quantization covers Linear layers; convolutions stay fp32
+        return torch.ao.quantization.quantize_dynamic(eager_model, {nn.Linear}, dtype=torch.qint8)
+    
+    return OnnxClassifier(export_onnx(eager_model, FISH_ONNX_PATH))
+
+
+def export_onnx(eager_model: nn.Module, onnx_path: str) -> str:
+    """Export to ONNX with a dynamic batch axis (re-exported when the weights are newer)"""
+    if os.path.exists(onnx_path) and os.path.getmtime(onnx_path) >= os.path.getmtime(MODEL_PATH):
+        return onnx_path
+    
+    print(f"📦 Exporting fish classifier to ONNX: {onnx_path}")
+    torch.onnx.export(
+        eager_model,
+        (torch.zeros(1, 3, INPUT_SIZE, INPUT_SIZE),),
+        onnx_path,
+        input_names=["images"],
+        output_names=["logits"],
+        dynamic_axes={"images": {0: "batch"}, "logits": {0: "batch"}},
+    )
+    return onnx_path
+
+
+class OnnxClassifier:
+    """ONNX Runtime session behind the torch model's tensor-in / logits-out interface"""
+    
+    def __init__(self, onnx_path: str):
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise ImportError("FISH_INFERENCE_BACKEND=onnx requires the onnxruntime package")
+        
+        options = ort.SessionOptions()
+        if FISH_INTRA_OP_THREADS > 0:
+            options.intra_op_num_threads = FISH_INTRA_OP_THREADS
+        if FISH_INTER_OP_THREADS > 0:
+            options.inter_op_num_threads = FISH_INTER_OP_THREADS
+        
+        self.session = ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+    
+    def __call__(self, images: torch.Tensor) -> torch.Tensor:
+        logits = self.session.run(None, {self.input_name: images.cpu().numpy()})[0]
+        return torch.from_numpy(logits)
+
+
+def warm_up(inference_model, device, runs: int = None):
+    """Run dummy batches so one-time initialization happens at load"""
+    runs = FISH_WARMUP_RUNS if runs is None else runs
+    example = torch.zeros(1, 3, INPUT_SIZE, INPUT_SIZE, device=device)
+    with torch.no_grad():
+        for _ in range(runs):
+            inference_model(example)
 
 
+IMAGENET_MEAN = [0.485, 0.456, 0.406]
+IMAGENET_STD = [0.229, 0.224, 0.225]
+
+# ToTensor + Normalize folded into one multiply-subtract on uint8 pixels:
+# (x / 255 - mean) / std == x * (1 / (255 * std)) - mean / std
+_NORM_SCALE = torch.tensor([1.0 / (255.0 * s) for s in IMAGENET_STD]).view(1, 3, 1, 1)
+_NORM_SHIFT = torch.tensor([m / s for m, s in zip(IMAGENET_MEAN, IMAGENET_STD)]).view(1, 3, 1, 1)
+
+
+@lru_cache(maxsize=None)
 def get_image_transforms():
     """
     Define image preprocessing transforms.
     These should match the transforms used during training.
+    
+    Built once and reused. Serving uses the equivalent load_image /
+    resize_image / normalize_batch pipeline below; this Compose is the
+    reference it is checked against.
     """
     return transforms.Compose([
         transforms.Resize((224, 224)),  # Resize to model input size
         transforms.ToTensor(),
         transforms.Normalize(
-            mean=[0.485, 0.456, 0.406],  # ImageNet normalization
-            std=[0.229, 0.224, 0.225]
+            mean=IMAGENET_MEAN,  # ImageNet normalization
+            std=IMAGENET_STD
         )
     ])
 
 
-def predict_fish_species(image: Image.Image):
+def load_image(source) -> Image.Image:
+    """
+    Decode image bytes or a lazily opened PIL Image.
+    
+    JPEGs are decoded in draft mode: libjpeg's DCT scaling decodes directly
+    at 1/2, 1/4 or 1/8 size while staying at least 224x224, so a 12MP photo
+    never gets decoded at full resolution.
+    """
+    image = Image.open(io.BytesIO(source)) if isinstance(source, (bytes, bytearray)) else source
+    if image.format == "JPEG":
+        image.draft("RGB", (INPUT_SIZE, INPUT_SIZE))
+    image.load()
+    return image
+
+
+def resize_image(image: Image.Image) -> Image.Image:
+    """RGB at the model input size (same bilinear resize as transforms.Resize)"""
+    # Convert to RGB if needed (handles RGBA, grayscale, etc.)
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    if image.size != (INPUT_SIZE, INPUT_SIZE):
+        image = image.resize((INPUT_SIZE, INPUT_SIZE), Image.Resampling.BILINEAR)
+    return image
+
+
+def normalize_batch(images: List[Image.Image]) -> torch.Tensor:
+    """Stack 224x224 RGB images into a normalized (N, 3, 224, 224) float tensor in one vectorized step"""
+    pixels = np.stack([np.asarray(image, dtype=np.uint8) for image in images])
+    batch = torch.from_numpy(pixels).permute(0, 3, 1, 2).float()
+    return batch.mul_(_NORM_SCALE).sub_(_NORM_SHIFT).contiguous()
+
+
+def decode_and_hash(source, timings: dict = None):
+    """
+    Decode an image and compute its perceptual hash for the result cache.
+    
+    Returns:
+        (decoded PIL Image, 64-bit hash)
+    """
+    t = time.perf_counter()
+    image = load_image(source)
+    _record(timings, "decode", t)
+    
+    t = time.perf_counter()
+    image_hash = perceptual_hash(image)
+    _record(timings, "hash", t)
+    return image, image_hash
+
+
+def _record(timings: Optional[dict], stage: str, start: float):
+    """Accumulate elapsed milliseconds for a pipeline stage"""
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + (time.perf_counter() - start) * 1000
+
+
+def predict_fish_species(image: Image.Image, timings: dict = None):
     """
     Predict fish species from a PIL Image.
     
     Args:
         image: PIL Image object
+        timings: Optional dict that receives per-stage milliseconds
+            (decode, resize, normalize, forward)
         
     Returns:
         dict: {
@@ -74,46 +308,87 @@ def predict_fish_species(image: Image.Image):
             "all_predictions": dict (optional, top 3 predictions)
         }
     """
+    return predict_fish_species_batch([image], timings=timings)[0]
+
+
+def predict_fish_species_batch(images: List, batch_size: int = FISH_BATCH_SIZE,
+                               timings: dict = None) -> List[dict]:
+    """
+    Predict fish species for many images, `batch_size` images per forward pass.
+    
+    Args:
+        images: PIL Image objects (opened or already decoded) or raw image bytes
+        batch_size: Images per model call
+        timings: Optional dict that receives per-stage milliseconds
+            (decode, resize, normalize, forward), summed over batches
+        
+    Returns:
+        list: One predict_fish_species-style dict per image, in input order
+    """
+    probabilities = predict_probabilities_batch(images, batch_size=batch_size, timings=timings)
+    
+    # Top 3 predictions (the first is the predicted class)
+    top3_prob, top3_classes = torch.topk(probabilities, 3, dim=1)
+    return [
+        _format_prediction(top3_prob[i].tolist(), top3_classes[i].tolist())
+        for i in range(len(images))
+    ]
+
+
+def predict_probabilities_batch(images: List, batch_size: int = FISH_BATCH_SIZE,
+                                timings: dict = None) -> torch.Tensor:
+    """
+    Softmax probabilities over all species, `batch_size` images per forward pass.
+    
+    Returns:
+        (N, num_classes) float tensor on the CPU, in input order
+    """
     global model, labels, device
     
     # Ensure model is loaded
     if model is None or labels is None:
         load_model_and_labels()
     
-    # Preprocess image
-    transform = get_image_transforms()
-    
-    # Convert to RGB if needed (handles RGBA, grayscale, etc.)
-    if image.mode != 'RGB':
-        image = image.convert('RGB')
-    
-    # Apply transforms
-    image_tensor = transform(image).unsqueeze(0)  # Add batch dimension
-    image_tensor = image_tensor.to(device)
-    
-    # Make prediction
-    with torch.no_grad():
-        outputs = model(image_tensor)
-        probabilities = torch.nn.functional.softmax(outputs, dim=1)
-        confidence, predicted_class = torch.max(probabilities, 1)
+    results = []
+    for start in range(0, len(images), batch_size):
+        batch = images[start:start + batch_size]
         
-        # Get top 3 predictions
-        top3_prob, top3_classes = torch.topk(probabilities, 3, dim=1)
-    
-    # Convert to Python types
-    predicted_idx = str(predicted_class.item())
-    confidence_score = confidence.item() * 100  # Convert to percentage
+        # Preprocess image
+        t = time.perf_counter()
+        batch = [load_image(image) for image in batch]
+        _record(timings, "decode", t)
+        
+        t = time.perf_counter()
+        batch = [resize_image(image) for image in batch]
+        _record(timings, "resize", t)
+        
+        t = time.perf_counter()
+        image_tensor = normalize_batch(batch).to(device)
+        _record(timings, "normalize", t)
+        
+        # Make prediction
+        t = time.perf_counter()
+        with torch.no_grad():
+            outputs = model(image_tensor)
+            results.append(torch.nn.functional.softmax(outputs, dim=1).cpu())
+        _record(timings, "forward", t)
     
+    if not results:
+        return torch.empty((0, len(labels)))
+    return torch.cat(results)
+
+
+def _format_prediction(top3_prob: List[float], top3_classes: List[int]) -> dict:
+    """Top-3 probabilities/classes for one image -> response schema"""
     # Get species name
-    species_name = labels.get(predicted_idx, "Unknown")
+    species_name = labels.get(str(top3_classes[0]), "Unknown")
+    confidence_score = top3_prob[0] * 100  # Convert to percentage
     
     # Get top 3 predictions
     top3_predictions = {}
-    for i in range(3):
-        class_idx = str(top3_classes[0][i].item())
-        prob = top3_prob[0][i].item() * 100
-        species = labels.get(class_idx, "Unknown")
-        top3_predictions[species] = round(prob, 2)
+    for prob, class_idx in zip(top3_prob, top3_classes):
+        species = labels.get(str(class_idx), "Unknown")
+        top3_predictions[species] = round(prob * 100, 2)
     
     return {
         "species": species_name,
@@ -122,6 +397,261 @@ def predict_fish_species(image: Image.Image):
     }
 
 
+fish_batcher = MicroBatcher(
+    predict_fish_species_batch,
+    max_batch_size=FISH_MICROBATCH_MAX_SIZE,
+    max_wait_ms=FISH_MICROBATCH_MAX_WAIT_MS,
+    executor=cpu_pool.executor,
+)
+
+
+async def predict_fish_species_async(image: Image.Image) -> dict:
+    """
+    Coalesced single-image prediction.
+    Concurrent callers share one batched forward pass.
+    """
+    return await fish_batcher.submit(image)
+
+
+def expand_uploads(files: List[tuple]) -> List[tuple]:
+    """
+    Expand zip archives among uploaded (filename, bytes) pairs into their image entries.
+    
+    Returns:
+        list: (filename, bytes) for every image, zip members named "archive.zip/member.jpg"
+    """
+    expanded = []
+    for filename, data in files:
+        if zipfile.is_zipfile(io.BytesIO(data)):
+            with zipfile.ZipFile(io.BytesIO(data)) as archive:
+                for member in archive.infolist():
+                    if not member.is_dir() and member.filename.lower().endswith(IMAGE_EXTENSIONS):
+                        expanded.append((f"{filename}/{member.filename}", archive.read(member)))
+        else:
+            expanded.append((filename, data))
+    return expanded
+
+
+def classify_image_files(files: List[tuple], batch_size: int = FISH_BATCH_SIZE,
+                         timings: dict = None) -> List[dict]:
+    """
+    Classify many uploaded images: parallel decode, then batched forward passes.
+    
+    Args:
+        files: (filename, bytes) pairs; zip archives are expanded
+        batch_size: Images per forward pass
+        timings: Optional dict that receives per-stage milliseconds
+            (decode is wall time of the parallel decode + hashing)
+        
+    Returns:
+        list: {"filename": str, "classification": {...}} per image, or
+              {"filename": str, "error": str} for images that failed to decode
+    """
+    files = expand_uploads(files)
+    t = time.perf_counter()
+    decoded = [_decode_pool.submit(decode_and_hash, data) for _, data in files]
+    
+    results = [None] * len(files)
+    images, hashes, positions = [], [], []
+    for i, ((filename, _), future) in enumerate(zip(files, decoded)):
+        try:
+            image, image_hash = future.result()
+        except Exception as e:
+            results[i] = {"filename": filename, "error": f"Failed to decode image: {str(e)}"}
+            continue
+        
+        # Near-duplicates of already classified images skip the forward pass
+        cached = fish_result_cache.get(image_hash)
+        if cached is not None:
+            results[i] = {"filename": filename, "classification": cached[0]["classification"]}
+        else:
+            images.append(image)
+            hashes.append(image_hash)
+            positions.append(i)
+    _record(timings, "decode", t)
+    
+    predictions = predict_fish_species_batch(images, batch_size=batch_size, timings=timings) if images else []
+    for i, image_hash, prediction in zip(positions, hashes, predictions):
+        fish_result_cache.put(image_hash, {"classification": prediction})
+        results[i] = {"filename": files[i][0], "classification": prediction}
+    
+    return results
+
+
+def iter_frames(files: List[tuple], sample_every: int = 1) -> Iterable[tuple]:
+    """
+    Lazily split uploads into frames: multi-frame TIFF/GIF pages are yielded
+    one by one and zip archives are expanded (members in archive order).
+    
+    Only every `sample_every`-th frame (counting every yielded item, as
+    FrameSequenceClassifier does) of a multi-frame file is decoded; the
+    others are yielded as (name, None) placeholders so frame numbering
+    is unchanged.
+    
+    Yields:
+        (frame name, PIL Image), or (name, None) for an upload that isn't an
+        image or a page that isn't sampled
+    """
+    position = 0
+    for filename, data in expand_uploads(files):
+        try:
+            image = Image.open(io.BytesIO(data))
+        except Exception:
+            position += 1
+            yield filename, None
+            continue
+        
+        if getattr(image, "n_frames", 1) == 1:
+            position += 1
+            yield filename, image
+        else:
+            for i, frame in enumerate(ImageSequence.Iterator(image)):
+                sampled = position % sample_every == 0
+                position += 1
+                # Pages share one Image object, so sampled pages are copied out by convert()
+                yield f"{filename}#{i}", frame.convert("RGB") if sampled else None
+
+
+class FrameSequenceClassifier:
+    """
+    Stateful classifier for one stream of frames (e.g. an onboard camera).
+    
+    Frames that are near-identical (by perceptual hash) to the last frame run
+    through the model reuse its probabilities, so a static scene costs one
+    hash per frame instead of a forward pass. Per-frame probabilities are
+    averaged over a sliding window of the last `window` frames, which
+    suppresses single-frame flicker between species.
+    """
+    
+    def __init__(self, window: int = FISH_STREAM_WINDOW, skip_distance: int = FISH_STREAM_SKIP_DISTANCE,
+                 sample_every: int = 1):
+        self.window = window
+        self.skip_distance = skip_distance
+        self.sample_every = sample_every
+        
+        self._window = deque(maxlen=window)
+        self._last_hash = None
+        self._last_probabilities = None
+        self.species = None
+        
+        # Monitoring counters
+        self.frames_received = 0
+        self.frames_classified = 0
+        self.frames_skipped = 0
+        self.frames_failed = 0
+        self.species_changes = 0
+        self.timings = {}
+    
+    def process(self, frames: Iterable[tuple]) -> List[dict]:
+        """
+        Classify the next frames of the stream in one batched forward pass.
+        
+        Args:
+            frames: (frame name, PIL Image or bytes) pairs, in stream order
+            
+        Returns:
+            list: One event per sampled frame:
+                {
+                    "frame": int, "name": str,
+                    "skipped": bool (prediction reused from a near-identical frame),
+                    "raw": {"species": str, "confidence": float},
+                    "smoothed": {"species", "confidence", "top_predictions"},
+                    "changed": bool (smoothed species differs from the previous frame's)
+                }
+                or {"frame": int, "name": str, "error": str}
+        """
+        start = time.perf_counter()
+        pending = []        # (frame index, name, image or None, error)
+        to_classify = []
+        for name, image in frames:
+            index = self.frames_received
+            self.frames_received += 1
+            if index % self.sample_every:
+                continue
+            
+            if image is None:
+                pending.append((index, name, None, "Not an image"))
+                continue
+            try:
+                image, image_hash = decode_and_hash(image, timings=self.timings)
+            except Exception as e:
+                pending.append((index, name, None, f"Failed to decode frame: {str(e)}"))
+                continue
+            
+            # Compare against the last *classified* frame, so slow drift still
+            # triggers a fresh prediction once it adds up
+            if self._last_hash is not None and \
+                    bin(image_hash ^ self._last_hash).count("1") <= self.skip_distance:
+                pending.append((index, name, None, None))
+            else:
+                self._last_hash = image_hash
+                pending.append((index, name, len(to_classify), None))
+                to_classify.append(image)
+        
+        probabilities = predict_probabilities_batch(to_classify, timings=self.timings).numpy() \
+            if to_classify else None
+        
+        events = []
+        for index, name, position, error in pending:
+            if error is not None:
+                self.frames_failed += 1
+                events.append({"frame": index, "name": name, "error": error})
+                continue
+            
+            skipped = position is None
+            if skipped:
+                self.frames_skipped += 1
+                frame_probabilities = self._last_probabilities
+            else:
+                self.frames_classified += 1
+                frame_probabilities = probabilities[position]
+            self._last_probabilities = frame_probabilities
+            
+            self._window.append(frame_probabilities)
+            smoothed = _format_probabilities(np.mean(self._window, axis=0))
+            changed = smoothed["species"] != self.species
+            if changed:
+                self.species_changes += 1
+                self.species = smoothed["species"]
+            
+            raw_class = int(np.argmax(frame_probabilities))
+            events.append({
+                "frame": index,
+                "name": name,
+                "skipped": skipped,
+                "raw": {
+                    "species": labels.get(str(raw_class), "Unknown"),
+                    "confidence": round(float(frame_probabilities[raw_class]) * 100, 2)
+                },
+                "smoothed": smoothed,
+                "changed": changed
+            })
+        
+        _record(self.timings, "total", start)
+        return events
+    
+    def summary(self) -> dict:
+        sampled = self.frames_classified + self.frames_skipped
+        total_seconds = self.timings.get("total", 0.0) / 1000
+        return {
+            "frames_received": self.frames_received,
+            "frames_classified": self.frames_classified,
+            "frames_skipped": self.frames_skipped,
+            "frames_failed": self.frames_failed,
+            "skip_rate": round(self.frames_skipped / sampled, 4) if sampled else 0.0,
+            "species": self.species,
+            "species_changes": self.species_changes,
+            "frames_per_second": round(self.frames_received / total_seconds, 1) if total_seconds else None,
+            "timings_ms": {stage: round(ms, 2) for stage, ms in self.timings.items()}
+        }
+
+
+def _format_probabilities(probabilities: np.ndarray) -> dict:
+    """Full probability vector for one image -> response schema"""
+    top3_classes = np.argsort(probabilities)[::-1][:3]
+    return _format_prediction(probabilities[top3_classes].tolist(), top3_classes.tolist())
+
+
 def predict_from_file_path(image_path: str):
     """
     Predict fish species from an image file path.
@@ -0,0 +1,164 @@
+"""
+Array-backed inference for tree ensembles.
+
+Flattens every tree of a fitted sklearn forest regressor into contiguous
+NumPy arrays (feature, threshold, children, missing-value direction, value)
+and evaluates rows by
+walking all trees at once with vectorized gathers. This skips sklearn's
+per-call input validation and joblib dispatch, which dominate latency
+for single-row and small-batch predictions.
+"""
+
+import numpy as np
+
+# Rows traversed together; bounds the (rows x trees) node-index working set
+DEFAULT_BLOCK_ROWS = 2048
+
+
+class FlatForest:
+    """A random forest regressor flattened into contiguous node arrays"""
+
+    def __init__(self, feature, threshold, children_left, children_right,
+                 value, roots, max_depth, n_features, missing_go_to_left=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.children_left = children_left
+        self.children_right = children_right
+        # Side taken by NaN features at each node (sklearn >= 1.3 learns it per split)
+        self.missing_go_to_left = (
+            missing_go_to_left if missing_go_to_left is not None
+            else np.zeros(len(feature), dtype=bool)
+        )
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.n_features = n_features
+        self.n_trees = len(roots)
+
+    @classmethod
+    def from_sklearn(cls, forest) -> "FlatForest":
+        """
+        Build a FlatForest from a fitted single-output forest regressor
+        (RandomForestRegressor / ExtraTreesRegressor).
+
+        Leaves are rewritten as self-loops with an infinite threshold, so a
+        fixed number of traversal steps (the deepest tree's depth) lands every
+        row on its leaf without per-node branching.
+        """
+        if getattr(forest, "n_outputs_", 1) != 1:
+            raise ValueError("FlatForest only supports single-output regressors")
+
+        features, thresholds, lefts, rights, missing_lefts, values, roots = [], [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for estimator in forest.estimators_:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            node_ids = np.arange(offset, offset + n_nodes, dtype=np.intp)
+            is_leaf = tree.children_left == -1
+
+            left = np.where(is_leaf, node_ids, tree.children_left + offset)
+            right = np.where(is_leaf, node_ids, tree.children_right + offset)
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(left)
+            rights.append(right)
+            missing_lefts.append(
+                np.asarray(getattr(tree, "missing_go_to_left", np.zeros(n_nodes)), dtype=bool)
+            )
+            values.append(tree.value[:, 0, 0])
+            roots.append(offset)
+
+            max_depth = max(max_depth, tree.max_depth)
+            offset += n_nodes
+
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features), dtype=np.intp),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64),
+            children_left=np.ascontiguousarray(np.concatenate(lefts), dtype=np.intp),
+            children_right=np.ascontiguousarray(np.concatenate(rights), dtype=np.intp),
+            value=np.ascontiguousarray(np.concatenate(values), dtype=np.float64),
+            missing_go_to_left=np.ascontiguousarray(np.concatenate(missing_lefts), dtype=bool),
+            roots=np.asarray(roots, dtype=np.intp),
+            max_depth=max_depth,
+            n_features=forest.n_features_in_,
+        )
+
+    def _prepare(self, X) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(
+                f"Expected an (n, {self.n_features}) feature matrix, got shape {X.shape}"
+            )
+        # sklearn compares float32 inputs against float64 thresholds;
+        # round-trip through float32 so splits land on the same side.
+        return X.astype(np.float32).astype(np.float64)
+
+    def apply(self, X, block_rows: int = DEFAULT_BLOCK_ROWS) -> np.ndarray:
+        """
+        Return the leaf index reached in every tree.
+
+        Returns:
+            np.ndarray of shape (n_rows, n_trees) with global node indices
+        """
+        X = self._prepare(X)
+        n_rows = X.shape[0]
+        leaves = np.empty((n_rows, self.n_trees), dtype=np.intp)
+
+        for start in range(0, n_rows, block_rows):
+            block = X[start:start + block_rows]
+            row_ids = np.arange(block.shape[0])[:, None]
+            nodes = np.broadcast_to(self.roots, (block.shape[0], self.n_trees))
+
+            has_missing = bool(np.isnan(block).any())
+
+            for _ in range(self.max_depth):
+                values = block[row_ids, self.feature[nodes]]
+                go_left = values <= self.threshold[nodes]
+                if has_missing:
+                    # NaN fails every comparison; follow the split's learned direction
+                    # (leaves are self-loops, so either side keeps them in place)
+                    go_left |= np.isnan(values) & self.missing_go_to_left[nodes]
+                nodes = np.where(go_left, self.children_left[nodes], self.children_right[nodes])
+
+            leaves[start:start + block.shape[0]] = nodes
+
+        return leaves
+
+    def predict_per_tree(self, X, block_rows: int = DEFAULT_BLOCK_ROWS) -> np.ndarray:
+        """
+        Return each tree's prediction.
+
+        Returns:
+            np.ndarray of shape (n_rows, n_trees)
+        """
+        return self.value[self.apply(X, block_rows)]
+
+    def leaf_values(self, tree_leaves: np.ndarray) -> np.ndarray:
+        """
+        Map per-tree leaf ids (e.g. from sklearn's forest.apply) to leaf values.
+
+        Args:
+            tree_leaves: (n_rows, n_trees) node ids local to each tree
+
+        Returns:
+            np.ndarray of shape (n_rows, n_trees)
+        """
+        return self.value[tree_leaves + self.roots]
+
+    def predict(self, X, block_rows: int = DEFAULT_BLOCK_ROWS) -> np.ndarray:
+        """
+        Return the forest prediction (mean over trees).
+
+        Returns:
+            np.ndarray of shape (n_rows,)
+        """
+        return self.predict_per_tree(X, block_rows).mean(axis=1)
+
+    def predict_one(self, row) -> float:
+        """Predict a single feature row, returning a Python float"""
+        return float(self.predict(np.asarray(row, dtype=np.float64).reshape(1, -1))[0])
@@ -0,0 +1,138 @@
+"""
+Perceptual-hash result cache for images.
+
+Each image is reduced to a 64-bit DCT perceptual hash (pHash): re-encoded,
+resized or slightly recompressed copies of the same photo land within a
+few bits of each other. Lookups compare the query hash against every stored
+hash at once (XOR + popcount over a NumPy uint64 array), which costs
+microseconds for thousands of entries - far below a model forward pass.
+"""
+
+import threading
+from typing import Any, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+HASH_BITS = 8          # 8x8 low-frequency block -> 64-bit hash
+DCT_SIZE = 32          # image is reduced to 32x32 grayscale before the DCT
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    """Orthonormal DCT-II matrix (rows are basis vectors)"""
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix.astype(np.float32)
+
+
+_DCT = _dct_matrix(DCT_SIZE)
+
+
+def _popcount64(values: np.ndarray) -> np.ndarray:
+    """Set bits per uint64 element (np.bitwise_count needs NumPy >= 2.0)"""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(values)
+    bits = np.unpackbits(values.view(np.uint8)).reshape(-1, 64)
+    return bits.sum(axis=1, dtype=np.uint8)
+
+
+def perceptual_hash(image: Image.Image) -> int:
+    """
+    64-bit pHash: sign of the 8x8 lowest DCT frequencies against their median.
+
+    Returns:
+        int in [0, 2**64)
+    """
+    gray = image.convert("L").resize((DCT_SIZE, DCT_SIZE), Image.Resampling.BILINEAR, reducing_gap=2.0)
+    pixels = np.asarray(gray, dtype=np.float32)
+    low = (_DCT @ pixels @ _DCT.T)[:HASH_BITS, :HASH_BITS].ravel()
+
+    # Median without the DC term, which only encodes overall brightness
+    bits = low > np.median(low[1:])
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+class PerceptualHashCache:
+    """
+    Bounded cache whose lookup returns the nearest stored entry within
+    `max_distance` differing bits (Hamming distance). The least recently
+    used entry is evicted when full.
+    """
+
+    def __init__(self, max_entries: int, max_distance: int = 4):
+        self.max_entries = max(0, max_entries)
+        self.max_distance = max_distance
+
+        self._hashes = np.zeros(self.max_entries, dtype=np.uint64)
+        self._last_used = np.zeros(self.max_entries, dtype=np.int64)  # 0 = empty slot
+        self._values = [None] * self.max_entries
+        self._clock = 0
+        self._lock = threading.Lock()
+
+        # Monitoring counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, image_hash: int) -> Optional[Tuple[Any, int]]:
+        """
+        Returns:
+            (value, hamming_distance) of the nearest entry, or None on a miss
+        """
+        if self.max_entries == 0:
+            return None
+
+        with self._lock:
+            distances = _popcount64(self._hashes ^ np.uint64(image_hash))
+            distances = np.where(self._last_used > 0, distances, HASH_BITS * HASH_BITS + 1)
+            slot = int(np.argmin(distances))
+            distance = int(distances[slot])
+
+            if distance > self.max_distance:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._clock += 1
+            self._last_used[slot] = self._clock
+            return self._values[slot], distance
+
+    def put(self, image_hash: int, value: Any):
+        """Store a value (an entry with the identical hash is replaced)"""
+        if self.max_entries == 0:
+            return
+
+        with self._lock:
+            same = np.flatnonzero((self._hashes == np.uint64(image_hash)) & (self._last_used > 0))
+            if len(same):
+                slot = int(same[0])
+            else:
+                # Empty slots have last_used 0, so they are taken before evicting
+                slot = int(np.argmin(self._last_used))
+                if self._last_used[slot] > 0:
+                    self.evictions += 1
+
+            self._clock += 1
+            self._hashes[slot] = image_hash
+            self._last_used[slot] = self._clock
+            self._values[slot] = value
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.max_entries > 0,
+            "entries": int(np.count_nonzero(self._last_used)),
+            "max_entries": self.max_entries,
+            "max_distance": self.max_distance,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._last_used[:] = 0
+            self._values = [None] * self.max_entries
@@ -0,0 +1,212 @@
+"""
+Local background job subsystem.
+
+Long-running work (SST fits, eDNA and overfishing analyses) is submitted as a
+job, executed on a bounded worker pool, and polled by clients instead of
+holding the HTTP connection open. Job metadata and results are persisted in
+SQLite, so finished results survive a server restart. Jobs that were still
+queued or running when the last server process stopped are marked
+"interrupted" by recover_interrupted(), which the app calls at startup.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, recover unconditionally
+    fcntl = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", os.path.join(BASE_DIR, "../data/jobs.sqlite3"))
+JOBS_MAX_WORKERS = int(os.getenv("JOBS_MAX_WORKERS", "4"))
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+INTERRUPTED = "interrupted"
+
+FINISHED_STATES = {SUCCEEDED, FAILED, CANCELLED, INTERRUPTED}
+
+
+class JobStore:
+    """SQLite-backed job table (one shared connection guarded by a lock)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    job_type TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    params TEXT,
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL,
+                    started_at REAL,
+                    finished_at REAL
+                )
+            """)
+        self._process_lock = None
+
+    def recover_interrupted(self) -> int:
+        """
+        Mark jobs left queued or running by a previous server as interrupted.
+
+        Every server process holds a shared lock on "<db>.lock" for its
+        lifetime; the jobs are only recovered when no other process holds it,
+        so a worker starting next to live ones leaves their jobs alone.
+
+        Returns:
+            Number of jobs marked interrupted
+        """
+        if self._process_lock is not None:
+            return 0
+
+        self._process_lock = open(self.path + ".lock", "a")
+        alone = True
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._process_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                alone = False
+
+        recovered = 0
+        if alone:
+            with self._lock, self._conn:
+                recovered = self._conn.execute(
+                    "UPDATE jobs SET status = ?, finished_at = ? WHERE status IN (?, ?)",
+                    (INTERRUPTED, time.time(), QUEUED, RUNNING),
+                ).rowcount
+
+        if fcntl is not None:
+            # Blocks until a concurrently starting worker has finished recovery
+            fcntl.flock(self._process_lock, fcntl.LOCK_SH)
+        return recovered
+
+    def create(self, job_type: str, params: dict) -> str:
+        job_id = uuid.uuid4().hex
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, job_type, status, params, created_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, job_type, QUEUED, json.dumps(params), time.time()),
+            )
+        return job_id
+
+    def update(self, job_id: str, **fields):
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE jobs SET {columns} WHERE id = ?",
+                (*fields.values(), job_id),
+            )
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+
+class JobManager:
+    """Runs registered job handlers on a thread pool and records their outcome"""
+
+    def __init__(self, store: JobStore, max_workers: int = JOBS_MAX_WORKERS):
+        self.store = store
+        self.handlers: Dict[str, Callable[[bytes, dict], dict]] = {}
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._futures = {}
+        self._cancel_requested = set()
+        self._lock = threading.Lock()
+
+    def register(self, job_type: str, handler: Callable[[bytes, dict], dict]):
+        """
+        Register a handler: handler(payload_bytes, params) -> JSON-serializable dict
+        """
+        self.handlers[job_type] = handler
+
+    def submit(self, job_type: str, payload: bytes, params: dict = None) -> dict:
+        if job_type not in self.handlers:
+            raise ValueError(f"Unknown job type '{job_type}'. Supported: {sorted(self.handlers)}")
+
+        params = params or {}
+        job_id = self.store.create(job_type, params)
+        future = self.executor.submit(self._run, job_id, job_type, payload, params)
+        with self._lock:
+            self._futures[job_id] = future
+        return self.status(job_id)
+
+    def _run(self, job_id: str, job_type: str, payload: bytes, params: dict):
+        self.store.update(job_id, status=RUNNING, started_at=time.time())
+        try:
+            result = self.handlers[job_type](payload, params)
+        except Exception as e:
+            outcome = {"status": FAILED, "error": str(e)}
+        else:
+            outcome = {"status": SUCCEEDED, "result": json.dumps(result)}
+
+        with self._lock:
+            self._futures.pop(job_id, None)
+            if job_id in self._cancel_requested:
+                # Running jobs cannot be interrupted; discard the outcome instead
+                self._cancel_requested.discard(job_id)
+                outcome = {"status": CANCELLED}
+
+        self.store.update(job_id, finished_at=time.time(), **outcome)
+
+    def status(self, job_id: str) -> Optional[dict]:
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+        with self._lock:
+            cancel_requested = job_id in self._cancel_requested
+        return {
+            "job_id": job["id"],
+            "job_type": job["job_type"],
+            "status": job["status"],
+            "params": json.loads(job["params"] or "{}"),
+            "error": job["error"],
+            "cancel_requested": cancel_requested,
+            "created_at": job["created_at"],
+            "started_at": job["started_at"],
+            "finished_at": job["finished_at"],
+        }
+
+    def result(self, job_id: str) -> Optional[dict]:
+        job = self.store.get(job_id)
+        if job is None or job["result"] is None:
+            return None
+        return json.loads(job["result"])
+
+    def cancel(self, job_id: str) -> Optional[dict]:
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+        if job["status"] in FINISHED_STATES:
+            return self.status(job_id)
+
+        with self._lock:
+            future = self._futures.get(job_id)
+            if future is not None and future.cancel():
+                self._futures.pop(job_id, None)
+                self.store.update(job_id, status=CANCELLED, finished_at=time.time())
+            else:
+                self._cancel_requested.add(job_id)
+
+        return self.status(job_id)
+
+
+job_manager = JobManager(JobStore(JOBS_DB_PATH))
@@ -0,0 +1,206 @@
+"""
+Local k-mer reference index for eDNA read identification.
+
+A barcode library (COI / 12S / 16S FASTA) is reduced to the set of
+canonical k-mers of each taxon. The index is three flat NumPy arrays:
+
+    kmers     sorted unique canonical k-mers (uint64, 2 bits per base)
+    offsets   postings range of kmers[i] is postings[offsets[i]:offsets[i + 1]]
+    postings  taxon ids (int32) containing each k-mer
+
+plus a small JSON file with k and the taxon names. Saved as .npy files the
+arrays are memory-mapped on load, so a large library is paged in on demand
+instead of being read into memory.
+
+K-mers come straight from 2-bit packed reads (services/packed_sequences.py).
+Reads are assigned in batches: all k-mers of the batch are looked up with
+one searchsorted, postings are expanded with repeat/arange gathers, and
+(read, taxon) hit counts are tallied with np.unique - no per-read or
+per-k-mer Python loop.
+"""
+
+import json
+import os
+from typing import Iterable, List, Union
+
+import numpy as np
+
+from services.packed_sequences import PackedSequences
+
+EDNA_KMER_SIZE = int(os.getenv("EDNA_KMER_SIZE", "15"))
+MAX_KMER_SIZE = 31  # 2 bits per base in a uint64
+
+INDEX_ARRAYS = ("kmers", "offsets", "postings")
+INDEX_META = "meta.json"
+
+
+def taxon_from_header(header: str) -> str:
+    """
+    Taxon label of a reference record.
+
+    Uses the last "|"-separated field, or the last ";" rank of a lineage
+    (e.g. "k__Animalia;...;s__Thunnus_albacares"), else the whole header;
+    rank prefixes are dropped and underscores become spaces.
+    """
+    label = header.split("|")[-1].strip()
+    if ";" in label:
+        label = [rank for rank in label.split(";") if rank.strip()][-1].strip()
+    if len(label) > 3 and label[1:3] == "__":
+        label = label[3:]
+    return label.replace("_", " ").strip() or header
+
+
+class KmerReferenceIndex:
+    """Canonical k-mer -> taxa postings over a reference barcode library"""
+
+    def __init__(self, k: int, kmers: np.ndarray, offsets: np.ndarray, postings: np.ndarray,
+                 taxa: List[str], n_references: int = 0):
+        self.k = k
+        self.kmers = kmers
+        self.offsets = offsets
+        self.postings = postings
+        self.taxa = taxa
+        self.n_references = n_references
+
+    @classmethod
+    def build(cls, batches: Iterable[PackedSequences], k: int = EDNA_KMER_SIZE) -> "KmerReferenceIndex":
+        """
+        Build from batches of reference sequences with ids (e.g.
+        services.sequence_io.iter_packed). Records with the same taxon label
+        are merged.
+        """
+        if not 1 <= k <= MAX_KMER_SIZE:
+            raise ValueError(f"k must be between 1 and {MAX_KMER_SIZE}")
+
+        taxon_ids = {}
+        kmer_parts, taxon_parts = [], []
+        n_references = 0
+        for batch in batches:
+            n_references += len(batch)
+            batch_taxa = np.array(
+                [taxon_ids.setdefault(taxon_from_header(i), len(taxon_ids)) for i in batch.ids], dtype=np.int32
+            )
+            kmers, owner, _ = batch.canonical_kmers(k)
+            kmers, taxa = _unique_pairs(kmers, batch_taxa[owner])
+            kmer_parts.append(kmers)
+            taxon_parts.append(taxa)
+
+        if not n_references:
+            raise ValueError("Reference library contains no sequences")
+
+        # Drop duplicate (kmer, taxon) pairs from records merged across batches
+        kmers, taxa = _unique_pairs(np.concatenate(kmer_parts), np.concatenate(taxon_parts))
+
+        unique_kmers, first = np.unique(kmers, return_index=True)
+        offsets = np.append(first, len(kmers)).astype(np.int64)
+        names = sorted(taxon_ids, key=taxon_ids.get)
+        return cls(k, unique_kmers, offsets, taxa, names, n_references)
+
+    def save(self, path: str):
+        """Write the index as .npy arrays plus meta.json into directory `path`"""
+        os.makedirs(path, exist_ok=True)
+        for name in INDEX_ARRAYS:
+            np.save(os.path.join(path, f"{name}.npy"), getattr(self, name))
+        with open(os.path.join(path, INDEX_META), "w") as f:
+            json.dump({"k": self.k, "taxa": self.taxa, "n_references": self.n_references}, f)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "KmerReferenceIndex":
+        """Open a saved index; arrays are memory-mapped read-only unless mmap=False"""
+        with open(os.path.join(path, INDEX_META)) as f:
+            meta = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r" if mmap else None)
+            for name in INDEX_ARRAYS
+        }
+        return cls(meta["k"], arrays["kmers"], arrays["offsets"], arrays["postings"],
+                   meta["taxa"], meta.get("n_references", 0))
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        return os.path.exists(os.path.join(path, INDEX_META))
+
+    def assign(self, sequences: Union[PackedSequences, List[bytes]]) -> dict:
+        """
+        Best-matching taxon for each read.
+
+        The score of a taxon is the fraction of the read's valid k-mers found
+        in that taxon's references.
+
+        Returns:
+            {
+                "taxon": int32 taxon id per read (-1 = no k-mer hit),
+                "score": float32 best score per read (0-1),
+                "ambiguous": bool per read (another taxon ties the best score),
+                "kmers": int32 valid k-mers per read
+            }
+        """
+        if not isinstance(sequences, PackedSequences):
+            sequences = PackedSequences.from_sequences(sequences)
+        n_reads = len(sequences)
+        taxon = np.full(n_reads, -1, dtype=np.int32)
+        score = np.zeros(n_reads, dtype=np.float32)
+        ambiguous = np.zeros(n_reads, dtype=bool)
+        if n_reads == 0 or len(self.kmers) == 0:
+            return {"taxon": taxon, "score": score, "ambiguous": ambiguous,
+                    "kmers": np.zeros(n_reads, dtype=np.int32)}
+
+        kmers, owner, totals = sequences.canonical_kmers(self.k)
+
+        # Only (read, taxon) tallies matter, so queries can be reordered; sorted
+        # queries make the binary searches walk the index nearly sequentially
+        order = np.argsort(kmers)
+        kmers, owner = kmers[order], owner[order]
+
+        position = np.searchsorted(self.kmers, kmers)
+        position[position == len(self.kmers)] = 0
+        hit = self.kmers[position] == kmers
+        position, owner = position[hit], owner[hit]
+
+        # Expand each hit into its postings: hit i covers postings[start_i:end_i]
+        starts = np.asarray(self.offsets[position])
+        counts = np.asarray(self.offsets[position + 1]) - starts
+        read_of_posting = np.repeat(owner, counts)
+        first_of_hit = np.repeat(np.cumsum(counts) - counts, counts)
+        posting_index = np.repeat(starts, counts) + (np.arange(len(read_of_posting)) - first_of_hit)
+        taxon_of_posting = np.asarray(self.postings[posting_index]).astype(np.int64)
+
+        # Hits per (read, taxon)
+        n_taxa = len(self.taxa)
+        pairs, pair_hits = np.unique(read_of_posting * n_taxa + taxon_of_posting, return_counts=True)
+        pair_read, pair_taxon = pairs // n_taxa, pairs % n_taxa
+
+        # Best taxon per read: sort by read, then hits descending
+        order = np.lexsort((-pair_hits, pair_read))
+        pair_read, pair_taxon, pair_hits = pair_read[order], pair_taxon[order], pair_hits[order]
+        first = np.ones(len(pair_read), dtype=bool)
+        first[1:] = pair_read[1:] != pair_read[:-1]
+
+        best_read = pair_read[first]
+        taxon[best_read] = pair_taxon[first]
+        score[best_read] = pair_hits[first] / np.maximum(totals[best_read], 1)
+
+        runner_up = np.flatnonzero(first[:-1] & ~first[1:]) + 1
+        ties = runner_up[pair_hits[runner_up] == pair_hits[runner_up - 1]]
+        ambiguous[pair_read[ties]] = True
+
+        return {"taxon": taxon, "score": score, "ambiguous": ambiguous, "kmers": totals.astype(np.int32)}
+
+    def stats(self) -> dict:
+        return {
+            "k": self.k,
+            "taxa": len(self.taxa),
+            "references": self.n_references,
+            "kmers": int(len(self.kmers)),
+            "postings": int(len(self.postings)),
+            "size_mb": round(sum(getattr(self, name).nbytes for name in INDEX_ARRAYS) / 1e6, 2)
+        }
+
+
+def _unique_pairs(kmers: np.ndarray, taxa: np.ndarray):
+    """(kmer, taxon) pairs sorted by kmer then taxon, duplicates removed"""
+    order = np.lexsort((taxa, kmers))
+    kmers, taxa = kmers[order], taxa[order]
+    keep = np.ones(len(kmers), dtype=bool)
+    keep[1:] = (kmers[1:] != kmers[:-1]) | (taxa[1:] != taxa[:-1])
+    return kmers[keep], taxa[keep]
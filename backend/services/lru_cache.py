@@ -0,0 +1,83 @@
+"""
+Thread-safe bounded LRU mapping shared by the in-process caches.
+
+Entries are evicted least-recently-used first once the cache holds more
+than `max_entries` entries or, when `sizeof` is given, more than
+`max_bytes` bytes in total.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterable, List, Optional, Tuple
+
+
+class LRUCache:
+    """Bounded LRU mapping by entry count and/or total size"""
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None,
+                 sizeof: Optional[Callable] = None):
+        if max_bytes is not None and sizeof is None:
+            raise ValueError("max_bytes requires a sizeof function")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.nbytes = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Value for key (marking it recently used), or None"""
+        with self._lock:
+            return self._get(key)
+
+    def get_many(self, keys: Iterable) -> List:
+        """Values for several keys under one lock (None where missing)"""
+        with self._lock:
+            return [self._get(key) for key in keys]
+
+    def put(self, key, value):
+        with self._lock:
+            self._put(key, value)
+            self._evict()
+
+    def put_many(self, items: Iterable[Tuple]):
+        """Insert several (key, value) pairs under one lock"""
+        with self._lock:
+            for key, value in items:
+                self._put(key, value)
+            self._evict()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _get(self, key):
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def _put(self, key, value):
+        if self.sizeof is not None:
+            previous = self._entries.get(key)
+            if previous is not None:
+                self.nbytes -= self.sizeof(previous)
+            self.nbytes += self.sizeof(value)
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+
+    def _evict(self):
+        while self._entries and (
+            (self.max_entries is not None and len(self._entries) > self.max_entries)
+            or (self.max_bytes is not None and self.nbytes > self.max_bytes)
+        ):
+            _, value = self._entries.popitem(last=False)
+            if self.sizeof is not None:
+                self.nbytes -= self.sizeof(value)
+            self.evictions += 1
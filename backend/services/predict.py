@@ -1,13 +1,244 @@
 import joblib
 import numpy as np
+import pandas as pd
 import os
 
+from services.forest_inference import FlatForest
+from services.batching import MicroBatcher
+from services.executors import cpu_pool
+from services.prediction_cache import QuantizedLRUCache
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 MODEL_PATH = os.path.join(BASE_DIR, "../models/chlorophyll_rf_model.pkl")
 
+# Column order the random forest was trained on
+FEATURE_COLUMNS = ["depth", "salinity", "ph"]
+
+# Rows per model.predict call in batch mode (bounds peak memory on large CSVs)
+BATCH_CHUNK_SIZE = int(os.getenv("CHLOROPHYLL_BATCH_CHUNK_SIZE", "50000"))
+
+# Rows read from an uploaded CSV at a time in streaming mode
+STREAM_CHUNK_ROWS = int(os.getenv("CHLOROPHYLL_STREAM_CHUNK_ROWS", "100000"))
+
+# "flat" = array-backed FlatForest for small inputs, "sklearn" = model.predict only
+INFERENCE_ENGINE = os.getenv("CHLOROPHYLL_INFERENCE_ENGINE", "flat").lower()
+
+# Largest chunk routed to FlatForest; beyond this sklearn's Cython traversal wins
+FLAT_ENGINE_MAX_ROWS = int(os.getenv("CHLOROPHYLL_FLAT_ENGINE_MAX_ROWS", "128"))
+
+# Micro-batching window for concurrent single-point requests on /api/predict
+MICROBATCH_MAX_SIZE = int(os.getenv("CHLOROPHYLL_MICROBATCH_MAX_SIZE", "64"))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("CHLOROPHYLL_MICROBATCH_MAX_WAIT_MS", "2"))
+
+# Optional prediction cache (0 = disabled); inputs are rounded to CACHE_DECIMALS
+CACHE_SIZE = int(os.getenv("CHLOROPHYLL_CACHE_SIZE", "0"))
+CACHE_DECIMALS = int(os.getenv("CHLOROPHYLL_CACHE_DECIMALS", "3"))
+
+DEFAULT_UNCERTAINTY_PERCENTILES = [5.0, 95.0]
+
+
+def _parse_percentiles(raw: str) -> list:
+    """Comma-separated percentiles in [0, 100]; the defaults if raw is empty or invalid"""
+    try:
+        percentiles = [float(q) for q in raw.split(",") if q.strip()]
+    except ValueError:
+        percentiles = []
+    if not percentiles or not all(0 <= q <= 100 for q in percentiles):
+        print(f"⚠️ Invalid CHLOROPHYLL_UNCERTAINTY_PERCENTILES '{raw}'; "
+              f"using {DEFAULT_UNCERTAINTY_PERCENTILES}")
+        return list(DEFAULT_UNCERTAINTY_PERCENTILES)
+    return percentiles
+
+
+# Percentiles of the per-tree distribution reported in uncertainty mode
+UNCERTAINTY_PERCENTILES = _parse_percentiles(os.getenv("CHLOROPHYLL_UNCERTAINTY_PERCENTILES", "5,95"))
+
+# Rows per chunk in uncertainty mode (each row carries one value per tree)
+UNCERTAINTY_CHUNK_SIZE = int(os.getenv("CHLOROPHYLL_UNCERTAINTY_CHUNK_SIZE", "10000"))
+
 model = joblib.load(MODEL_PATH)
+# Always flattened: the leaf value arrays also back per-tree uncertainty
+flat_forest = FlatForest.from_sklearn(model)
+use_flat_engine = INFERENCE_ENGINE == "flat"
+prediction_cache = QuantizedLRUCache(CACHE_SIZE, CACHE_DECIMALS) if CACHE_SIZE > 0 else None
 
 def predict_chlorophyll(depth: float, salinity: float, ph: float) -> float:
+    if prediction_cache is not None:
+        return float(predict_chlorophyll_batch(np.array([[depth, salinity, ph]]))[0])
+
+    if use_flat_engine:
+        return flat_forest.predict_one([depth, salinity, ph])
+
     X = np.array([[depth, salinity, ph]])
     prediction = model.predict(X)[0]
-    return float(prediction)
\ No newline at end of file
+    return float(prediction)
+
+
+def _predict_matrix(X: np.ndarray) -> np.ndarray:
+    """Run the fastest available engine for a feature matrix of this size"""
+    if use_flat_engine and X.shape[0] <= FLAT_ENGINE_MAX_ROWS:
+        return flat_forest.predict(X)
+    return model.predict(X)
+
+
+def _predict_per_tree(X: np.ndarray) -> np.ndarray:
+    """
+    Per-tree predictions, shape (n_rows, n_trees), in one vectorized pass.
+    Large inputs use sklearn's apply() for leaf lookup, then gather values
+    from the flattened leaf arrays.
+    """
+    if use_flat_engine and X.shape[0] <= FLAT_ENGINE_MAX_ROWS:
+        return flat_forest.predict_per_tree(X)
+    return flat_forest.leaf_values(model.apply(X.astype(np.float32)))
+
+
+def _to_feature_matrix(data) -> np.ndarray:
+    """
+    Convert a DataFrame (depth, salinity, ph columns) or an (n, 3) array
+    into a contiguous float64 feature matrix.
+    """
+    if isinstance(data, pd.DataFrame):
+        X = data[FEATURE_COLUMNS].to_numpy(dtype=np.float64)
+    else:
+        X = np.asarray(data, dtype=np.float64)
+
+    if X.ndim != 2 or X.shape[1] != len(FEATURE_COLUMNS):
+        raise ValueError(
+            f"Expected an (n, {len(FEATURE_COLUMNS)}) matrix of {FEATURE_COLUMNS}, got shape {X.shape}"
+        )
+
+    return np.ascontiguousarray(X)
+
+
+def predict_chlorophyll_batch(data, chunk_size: int = BATCH_CHUNK_SIZE,
+                              use_cache: bool = True) -> np.ndarray:
+    """
+    Predict chlorophyll for many rows at once.
+
+    Runs one vectorized model.predict per chunk of `chunk_size` rows
+    instead of one call per row. When the prediction cache is enabled,
+    only rows not already cached (after quantization) reach the model.
+
+    Args:
+        data: DataFrame with depth, salinity, ph columns, or an (n, 3) array
+        chunk_size: Maximum rows passed to the model in a single call
+        use_cache: Set False for inputs unlikely to repeat (e.g. grids)
+
+    Returns:
+        np.ndarray of shape (n,) with predicted chlorophyll values
+    """
+    if chunk_size <= 0:
+        raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+
+    X = _to_feature_matrix(data)
+
+    if use_cache and prediction_cache is not None:
+        return prediction_cache.predict(X, lambda Xq: _predict_chunked(Xq, chunk_size))
+
+    return _predict_chunked(X, chunk_size)
+
+
+def _predict_chunked(X: np.ndarray, chunk_size: int) -> np.ndarray:
+    predictions = np.empty(X.shape[0], dtype=np.float64)
+
+    for start in range(0, X.shape[0], chunk_size):
+        stop = start + chunk_size
+        predictions[start:stop] = _predict_matrix(X[start:stop])
+
+    return predictions
+
+
+def predict_chlorophyll_uncertainty(data, percentiles=None,
+                                    chunk_size: int = UNCERTAINTY_CHUNK_SIZE) -> dict:
+    """
+    Predict chlorophyll with spread estimates from the individual trees.
+
+    Args:
+        data: DataFrame with depth, salinity, ph columns, or an (n, 3) array
+        percentiles: Percentiles of the per-tree distribution to report
+            (defaults to UNCERTAINTY_PERCENTILES)
+        chunk_size: Maximum rows evaluated per pass
+
+    Returns:
+        dict of np.ndarray (n,): "mean", "std" and one "p<q>" per percentile
+    """
+    if chunk_size <= 0:
+        raise ValueError(f"chunk_size must be positive, got {chunk_size}")
+
+    X = _to_feature_matrix(data)
+    percentiles = UNCERTAINTY_PERCENTILES if percentiles is None else list(percentiles)
+
+    result = {"mean": np.empty(X.shape[0]), "std": np.empty(X.shape[0])}
+    for q in percentiles:
+        result[f"p{q:g}"] = np.empty(X.shape[0])
+
+    for start in range(0, X.shape[0], chunk_size):
+        stop = start + chunk_size
+        per_tree = _predict_per_tree(X[start:stop])
+
+        result["mean"][start:stop] = per_tree.mean(axis=1)
+        result["std"][start:stop] = per_tree.std(axis=1)
+        if percentiles:
+            bounds = np.percentile(per_tree, percentiles, axis=1)
+            for q, values in zip(percentiles, bounds):
+                result[f"p{q:g}"][start:stop] = values
+
+    return result
+
+
+def iter_chlorophyll_predictions(chunks, chunk_size: int = BATCH_CHUNK_SIZE,
+                                 uncertainty: bool = False):
+    """
+    Predict chlorophyll over an iterable of DataFrame chunks
+    (e.g. pd.read_csv(..., chunksize=STREAM_CHUNK_ROWS)).
+
+    Only one chunk is held in memory at a time, so peak memory stays
+    bounded regardless of the total number of rows.
+
+    Yields:
+        Each chunk with normalized column names and a
+        predicted_chlorophyll column added (plus chlorophyll_std and
+        chlorophyll_p<q> columns when uncertainty=True)
+    """
+    for chunk in chunks:
+        chunk.columns = chunk.columns.str.lower().str.strip()
+
+        if uncertainty:
+            stats = predict_chlorophyll_uncertainty(chunk)
+            chunk["predicted_chlorophyll"] = stats.pop("mean")
+            for name, values in stats.items():
+                chunk[f"chlorophyll_{name}"] = values
+        else:
+            chunk["predicted_chlorophyll"] = predict_chlorophyll_batch(chunk, chunk_size)
+
+        yield chunk
+
+
+def _predict_rows(rows) -> list:
+    """Batch function for the micro-batcher: list of (depth, salinity, ph) -> list of floats"""
+    return predict_chlorophyll_batch(np.array(rows, dtype=np.float64)).tolist()
+
+
+chlorophyll_batcher = MicroBatcher(
+    _predict_rows,
+    max_batch_size=MICROBATCH_MAX_SIZE,
+    max_wait_ms=MICROBATCH_MAX_WAIT_MS,
+    executor=cpu_pool.executor,
+)
+
+
+async def predict_chlorophyll_async(depth: float, salinity: float, ph: float) -> float:
+    """
+    Coalesced single-point prediction.
+    Concurrent callers share one batched model call.
+    """
+    return await chlorophyll_batcher.submit((depth, salinity, ph))
+
+
+def get_prediction_stats() -> dict:
+    """Monitoring counters for the chlorophyll prediction path"""
+    return {
+        "inference_engine": INFERENCE_ENGINE,
+        "cache": prediction_cache.stats() if prediction_cache is not None else {"enabled": False},
+        "microbatcher": chlorophyll_batcher.stats(),
+    }
@@ -0,0 +1,87 @@
+"""
+Quantized LRU cache for tabular model predictions.
+
+Inputs are rounded to a fixed number of decimals before lookup, so sensor
+readings reported at instrument precision map onto the same key. Batches
+are deduplicated first, so repeated rows in one file hit the model once.
+"""
+
+from typing import Callable
+
+import numpy as np
+
+from services.lru_cache import LRUCache
+
+
+class QuantizedLRUCache:
+    """Bounded LRU cache keyed on feature rows rounded to `decimals`"""
+
+    def __init__(self, max_entries: int, decimals: int = 3):
+        self.max_entries = max_entries
+        self.decimals = decimals
+
+        self._entries = LRUCache(max_entries)
+
+        # Monitoring counters
+        self.hits = 0
+        self.misses = 0
+        self.deduplicated_rows = 0
+
+    def quantize(self, X: np.ndarray) -> np.ndarray:
+        # + 0.0 folds -0.0 into 0.0 so both produce the same key bytes
+        return np.round(np.asarray(X, dtype=np.float64), self.decimals) + 0.0
+
+    def predict(self, X: np.ndarray, predict_fn: Callable[[np.ndarray], np.ndarray]) -> np.ndarray:
+        """
+        Predict rows of X, computing only rows not already cached.
+
+        Args:
+            X: (n, n_features) feature matrix
+            predict_fn: Called once with the quantized matrix of missing rows
+
+        Returns:
+            np.ndarray of shape (n,)
+        """
+        if X.shape[0] == 0:
+            return np.empty(0, dtype=np.float64)
+
+        Xq = self.quantize(X)
+        unique_rows, inverse = np.unique(Xq, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        keys = [row.tobytes() for row in unique_rows]
+
+        values = np.empty(len(keys), dtype=np.float64)
+        missing = []
+
+        for i, value in enumerate(self._entries.get_many(keys)):
+            if value is None:
+                missing.append(i)
+            else:
+                values[i] = value
+
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+        self.deduplicated_rows += X.shape[0] - len(keys)
+
+        if missing:
+            computed = np.asarray(predict_fn(unique_rows[missing]), dtype=np.float64)
+            values[missing] = computed
+            self._entries.put_many((keys[i], value) for i, value in zip(missing, computed.tolist()))
+
+        return values[inverse]
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "decimals": self.decimals,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self._entries.evictions,
+            "deduplicated_rows": self.deduplicated_rows,
+        }
@@ -0,0 +1,154 @@
+"""
+Vectorized quality control for FASTQ reads.
+
+Reads are processed as 2-bit packed batches (services/packed_sequences.py),
+whose qualities are one flat array: sliding-window means, expected errors
+and N counts (from the batch's ambiguity mask) all come from cumulative
+sums over the batch, with per-read offsets marking where each read
+starts. There is no per-base Python loop, and surviving reads are trimmed
+in the packed form.
+
+Per read, in order:
+    1. trim at the start of the first `window`-base window whose mean
+       quality is below `min_window_quality`
+    2. drop if the trimmed read is shorter than `min_length`
+    3. drop if it has more than `max_ns` ambiguous bases (anything not A/C/G/T)
+    4. drop if its expected errors, sum(10 ** (-Q / 10)), exceed `max_expected_errors`
+
+Batches without qualities (FASTA / raw) pass through unchanged.
+"""
+
+import os
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from services.packed_sequences import PackedSequences
+
+EDNA_QC_WINDOW = int(os.getenv("EDNA_QC_WINDOW", "4"))
+EDNA_QC_MIN_WINDOW_QUALITY = float(os.getenv("EDNA_QC_MIN_WINDOW_QUALITY", "20"))
+EDNA_QC_MIN_LENGTH = int(os.getenv("EDNA_QC_MIN_LENGTH", "50"))
+EDNA_QC_MAX_EXPECTED_ERRORS = float(os.getenv("EDNA_QC_MAX_EXPECTED_ERRORS", "1.0"))
+EDNA_QC_MAX_NS = int(os.getenv("EDNA_QC_MAX_NS", "0"))
+EDNA_QC_PHRED_OFFSET = int(os.getenv("EDNA_QC_PHRED_OFFSET", "33"))
+
+
+def _with_zero(values: np.ndarray) -> np.ndarray:
+    """Cumulative sum with a leading 0, so range sums are csum[end] - csum[start]"""
+    return np.concatenate(([0], np.cumsum(values)))
+
+
+class ReadQC:
+    """Batch FASTQ trimming and filtering with per-run statistics"""
+
+    def __init__(self, window: int = EDNA_QC_WINDOW,
+                 min_window_quality: float = EDNA_QC_MIN_WINDOW_QUALITY,
+                 min_length: int = EDNA_QC_MIN_LENGTH,
+                 max_expected_errors: float = EDNA_QC_MAX_EXPECTED_ERRORS,
+                 max_ns: int = EDNA_QC_MAX_NS,
+                 phred_offset: int = EDNA_QC_PHRED_OFFSET):
+        self.window = max(1, window)
+        self.min_window_quality = min_window_quality
+        self.min_length = min_length
+        self.max_expected_errors = max_expected_errors
+        self.max_ns = max_ns
+        self.phred_offset = phred_offset
+
+        # Error probability per quality byte
+        phred = np.clip(np.arange(256) - phred_offset, 0, None)
+        self._error_probability = 10.0 ** (-phred / 10.0)
+
+        # Per-run counters
+        self.reads_in = 0
+        self.reads_passed = 0
+        self.reads_trimmed = 0
+        self.failed_length = 0
+        self.failed_ns = 0
+        self.failed_expected_errors = 0
+        self.unchecked = 0
+        self.bases_in = 0
+        self.bases_out = 0
+        self.quality_sum_in = 0
+        self.quality_sum_out = 0
+
+    def filter(self, batches: Iterable[PackedSequences]) -> Iterator[PackedSequences]:
+        """Stream of batches holding only the reads that pass QC, trimmed"""
+        for batch in batches:
+            if batch.qualities is None:
+                self.unchecked += len(batch)
+                yield batch
+            else:
+                yield self.filter_batch(batch)
+
+    def filter_batch(self, batch: PackedSequences) -> PackedSequences:
+        """QC one batch of FASTQ reads"""
+        lengths = batch.lengths
+        starts = batch.offsets[:-1]
+        quality_bytes = batch.qualities
+        phred = np.clip(quality_bytes.astype(np.int64) - self.phred_offset, 0, None)
+        n_bases = len(phred)
+
+        phred_csum = _with_zero(phred)
+        error_csum = _with_zero(self._error_probability[quality_bytes])
+        ambiguous_csum = _with_zero(batch.ambiguous_mask())
+
+        # Sliding-window trim: window starting at flat position p covers p .. p + window - 1
+        trimmed = lengths.copy()
+        w = self.window
+        if n_bases >= w:
+            owner = batch.owners()[:n_bases - w + 1]
+            offset = np.arange(n_bases - w + 1) - starts[owner]
+            inside = offset + w <= lengths[owner]
+            low = inside & (phred_csum[w:] - phred_csum[:-w] < self.min_window_quality * w)
+
+            # First low window per read (positions are in read order)
+            failing = np.flatnonzero(low)
+            failing_reads, first = np.unique(owner[failing], return_index=True)
+            trimmed[failing_reads] = offset[failing[first]]
+
+        ends = starts + trimmed
+        ns = ambiguous_csum[ends] - ambiguous_csum[starts]
+        expected_errors = error_csum[ends] - error_csum[starts]
+
+        too_short = trimmed < self.min_length
+        too_many_ns = ~too_short & (ns > self.max_ns)
+        too_many_errors = ~too_short & ~too_many_ns & (expected_errors > self.max_expected_errors)
+        passed = ~(too_short | too_many_ns | too_many_errors)
+
+        self.reads_in += len(batch)
+        self.reads_passed += int(passed.sum())
+        self.reads_trimmed += int((passed & (trimmed < lengths)).sum())
+        self.failed_length += int(too_short.sum())
+        self.failed_ns += int(too_many_ns.sum())
+        self.failed_expected_errors += int(too_many_errors.sum())
+        self.bases_in += n_bases
+        self.bases_out += int(trimmed[passed].sum())
+        self.quality_sum_in += int(phred_csum[-1])
+        self.quality_sum_out += int((phred_csum[ends] - phred_csum[starts])[passed].sum())
+
+        kept = np.flatnonzero(passed)
+        return batch.slice(0, trimmed[kept], kept)
+
+    def stats(self) -> dict:
+        return {
+            "reads_in": self.reads_in,
+            "reads_passed": self.reads_passed,
+            "pass_rate": round(self.reads_passed / self.reads_in, 4) if self.reads_in else 0.0,
+            "reads_trimmed": self.reads_trimmed,
+            "failed_min_length": self.failed_length,
+            "failed_n_content": self.failed_ns,
+            "failed_expected_errors": self.failed_expected_errors,
+            "not_quality_checked": self.unchecked,
+            "bases_in": self.bases_in,
+            "bases_out": self.bases_out,
+            "mean_quality_in": round(self.quality_sum_in / self.bases_in, 2) if self.bases_in else None,
+            "mean_quality_out": round(self.quality_sum_out / self.bases_out, 2) if self.bases_out else None,
+            "settings": {
+                "window": self.window,
+                "min_window_quality": self.min_window_quality,
+                "min_length": self.min_length,
+                "max_expected_errors": self.max_expected_errors,
+                "max_ns": self.max_ns,
+                "phred_offset": self.phred_offset
+            }
+        }
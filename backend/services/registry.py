@@ -0,0 +1,149 @@
+"""
+Lazy registry for heavy subsystems.
+
+Importing main.py used to load pandas, the RandomForest model, the Groq
+clients and the RAG vector store before the server could accept a single
+request. Each heavy subsystem is now registered here by module path and is
+imported (and optionally initialized) on first use, or ahead of time by a
+background warmup thread started at application startup. Load state and
+load time per subsystem are reported by /api/health/ready.
+"""
+
+import asyncio
+import importlib
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+NOT_LOADED = "not_loaded"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+# Subsystems loaded by the startup warmup thread (comma-separated, "" = none)
+WARMUP_SUBSYSTEMS = os.getenv(
+    "WARMUP_SUBSYSTEMS", "pandas,chlorophyll,sst,prophet,agents,edna"
+)
+
+
+class Subsystem:
+    """One lazily imported module plus an optional zero-argument init function"""
+
+    def __init__(self, name: str, module_path: str, init: Optional[str] = None):
+        self.name = name
+        self.module_path = module_path
+        self.init = init
+
+        self._lock = threading.Lock()
+        self._module = None
+        self.state = NOT_LOADED
+        self.load_seconds = None
+        self.error = None
+
+    def load(self):
+        """Import (and initialize) the module once; concurrent callers wait for the first"""
+        if self._module is not None:
+            return self._module
+
+        with self._lock:
+            if self._module is None:
+                self.state = LOADING
+                start = time.perf_counter()
+                try:
+                    module = importlib.import_module(self.module_path)
+                    if self.init:
+                        getattr(module, self.init)()
+                except Exception as e:
+                    self.state = FAILED
+                    self.error = str(e)
+                    self.load_seconds = time.perf_counter() - start
+                    raise
+
+                self.load_seconds = time.perf_counter() - start
+                self.error = None
+                self.state = READY
+                self._module = module
+
+        return self._module
+
+    def status(self) -> dict:
+        return {
+            "state": self.state,
+            "module": self.module_path,
+            "load_seconds": round(self.load_seconds, 3) if self.load_seconds is not None else None,
+            "error": self.error,
+        }
+
+
+class LazyModule:
+    """Module stand-in: attribute access loads the subsystem on first use"""
+
+    def __init__(self, subsystem: Subsystem):
+        self._subsystem = subsystem
+
+    def __getattr__(self, attr):
+        return getattr(self._subsystem.load(), attr)
+
+
+class SubsystemRegistry:
+    def __init__(self):
+        self._subsystems: Dict[str, Subsystem] = {}
+        self.warmup_targets: List[str] = []
+        self.warmup_started_at = None
+        self.warmup_finished_at = None
+
+    def register(self, name: str, module_path: str, init: Optional[str] = None) -> LazyModule:
+        """
+        Register a subsystem.
+
+        Returns:
+            LazyModule that can be bound at module level in place of an import
+        """
+        subsystem = Subsystem(name, module_path, init)
+        self._subsystems[name] = subsystem
+        return LazyModule(subsystem)
+
+    def get(self, name: str):
+        """Loaded module for a subsystem (blocking on first use)"""
+        return self._subsystems[name].load()
+
+    async def aget(self, name: str):
+        """Loaded module for a subsystem, importing off the event loop if needed"""
+        subsystem = self._subsystems[name]
+        if subsystem.state == READY:
+            return subsystem.load()
+        return await asyncio.get_running_loop().run_in_executor(None, subsystem.load)
+
+    def warmup(self, names: List[str] = None) -> threading.Thread:
+        """Load subsystems in a background thread (failures are recorded, not raised)"""
+        if names is None:
+            names = [n.strip() for n in WARMUP_SUBSYSTEMS.split(",") if n.strip()]
+        self.warmup_targets = [n for n in names if n in self._subsystems]
+
+        def run():
+            self.warmup_started_at = time.time()
+            for name in self.warmup_targets:
+                try:
+                    self._subsystems[name].load()
+                    print(f"✅ Warmed up {name} in {self._subsystems[name].load_seconds:.2f}s")
+                except Exception as e:
+                    print(f"⚠️ Warmup of {name} failed: {e}")
+            self.warmup_finished_at = time.time()
+
+        thread = threading.Thread(target=run, name="subsystem-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def is_loaded(self, name: str) -> bool:
+        return self._subsystems[name].state == READY
+
+    def is_ready(self) -> bool:
+        """All warmup targets loaded successfully"""
+        return all(self._subsystems[name].state == READY for name in self.warmup_targets)
+
+    def status(self) -> dict:
+        return {name: subsystem.status() for name, subsystem in self._subsystems.items()}
+
+
+registry = SubsystemRegistry()
@@ -0,0 +1,163 @@
+"""
+Streaming FASTA / FASTQ reader for eDNA uploads.
+
+Records are yielded one at a time from a binary file object, so a
+multi-gigabyte run is never decoded or split into lines in memory at once.
+Gzip-compressed input is detected from its magic bytes, regardless of the
+file name. iter_packed groups the records into 2-bit packed batches
+(services/packed_sequences.py) for the QC, dereplication and k-mer stages.
+"""
+
+import gzip
+import io
+import os
+from typing import BinaryIO, Iterator, Optional, Union
+
+from services.packed_sequences import PackedSequences, iter_batches
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+# Reads per packed batch flowing through the eDNA pipeline
+EDNA_BATCH_READS = int(os.getenv("EDNA_BATCH_READS", "4096"))
+
+# Whitespace removed from sequence lines
+_STRIP = b" \t\r\n"
+
+
+class SequenceRecord:
+    """One read / sequence: id, uppercase bases as bytes, optional FASTQ quality bytes"""
+
+    __slots__ = ("id", "sequence", "quality", "format")
+
+    def __init__(self, id: str, sequence: bytes, quality: Optional[bytes] = None, format: str = "FASTA"):
+        self.id = id
+        self.sequence = sequence
+        self.quality = quality
+        self.format = format
+
+    @property
+    def length(self) -> int:
+        return len(self.sequence)
+
+    def to_dict(self) -> dict:
+        """Same shape as eDNAAnalyzer.parse_fasta_sequence"""
+        data = {
+            "sequence_id": self.id,
+            "sequence": self.sequence.decode("ascii", "replace"),
+            "length": self.length,
+            "format": self.format
+        }
+        if self.format == "FASTQ":
+            data["quality_scores"] = self.quality.decode("ascii", "replace")
+        return data
+
+    def __repr__(self):
+        return f"SequenceRecord({self.id!r}, length={self.length}, format={self.format!r})"
+
+
+def open_sequence_stream(source: Union[bytes, str, BinaryIO]) -> BinaryIO:
+    """
+    Buffered binary stream over an upload, transparently gunzipped.
+
+    Args:
+        source: Raw bytes, text, or a binary file object (e.g. UploadFile.file)
+    """
+    if isinstance(source, str):
+        source = source.encode("utf-8")
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+
+    stream = source if isinstance(source, io.BufferedReader) else io.BufferedReader(_Unclosable(source))
+    if stream.peek(2)[:2] == GZIP_MAGIC:
+        return gzip.GzipFile(fileobj=stream, mode="rb")
+    return stream
+
+
+class _Unclosable(io.RawIOBase):
+    """Raw wrapper so BufferedReader can wrap any readable object without closing it"""
+
+    def __init__(self, fileobj):
+        self._fileobj = fileobj
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._fileobj.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def iter_records(source: Union[bytes, str, BinaryIO]) -> Iterator[SequenceRecord]:
+    """
+    Stream every record of a FASTA, FASTQ or raw sequence upload (optionally gzipped).
+
+    FASTA sequences and FASTQ sequence/quality may be wrapped over several
+    lines. Input without a header is read as one raw sequence.
+
+    Raises:
+        ValueError: Malformed FASTQ record
+    """
+    lines = (line for line in open_sequence_stream(source) if line.strip())
+    first = next(lines, None)
+    if first is None:
+        return
+
+    if first.startswith(b">"):
+        yield from _iter_fasta(first, lines)
+    elif first.startswith(b"@"):
+        yield from _iter_fastq(first, lines)
+    else:
+        sequence = b"".join(line.translate(None, _STRIP) for line in [first, *lines]).upper()
+        yield SequenceRecord("Unknown", sequence, format="RAW")
+
+
+def iter_packed(source: Union[bytes, str, BinaryIO], batch_size: int = EDNA_BATCH_READS) -> Iterator[PackedSequences]:
+    """Every record of the upload, in 2-bit packed batches of up to batch_size reads"""
+    return iter_batches(iter_records(source), batch_size)
+
+
+def _header_id(line: bytes) -> str:
+    return line[1:].strip().decode("utf-8", "replace")
+
+
+def _iter_fasta(header: bytes, lines) -> Iterator[SequenceRecord]:
+    chunks = []
+    for line in lines:
+        if line.startswith(b">"):
+            yield SequenceRecord(_header_id(header), b"".join(chunks).upper())
+            header, chunks = line, []
+        else:
+            chunks.append(line.translate(None, _STRIP))
+    yield SequenceRecord(_header_id(header), b"".join(chunks).upper())
+
+
+def _iter_fastq(header: bytes, lines) -> Iterator[SequenceRecord]:
+    while header is not None:
+        if not header.startswith(b"@"):
+            raise ValueError(f"Malformed FASTQ: expected '@' header, got {header[:40]!r}")
+        record_id = _header_id(header)
+
+        chunks = []
+        for line in lines:
+            if line.startswith(b"+"):
+                break
+            chunks.append(line.translate(None, _STRIP))
+        else:
+            raise ValueError(f"Malformed FASTQ: record {record_id!r} has no '+' separator")
+        sequence = b"".join(chunks).upper()
+
+        # Quality may itself start with '@', so read by length rather than by marker
+        quality = b""
+        while len(quality) < len(sequence):
+            line = next(lines, None)
+            if line is None:
+                break
+            quality += line.translate(None, _STRIP)
+        if len(quality) != len(sequence):
+            raise ValueError(
+                f"Malformed FASTQ: record {record_id!r} has {len(sequence)} bases but {len(quality)} quality scores"
+            )
+
+        yield SequenceRecord(record_id, sequence, quality, format="FASTQ")
+        header = next(lines, None)
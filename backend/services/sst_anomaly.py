@@ -0,0 +1,357 @@
+"""
+Marine heatwave detection over daily SST series.
+
+Follows the Hobday et al. (2016) definition: a day-of-year climatology and
+percentile threshold are computed from an 11-day window around each calendar
+day and smoothed with a 31-day moving average; a heatwave is a run of at
+least 5 days above the threshold, and runs separated by gaps of 2 days or
+fewer are merged.
+
+All stations are laid out on a (station, year, 366-day) calendar array, so
+climatologies, threshold comparisons and run detection are vectorized across
+stations and decades. Climatologies are cached per station, so repeated
+queries on the same history only pay for the threshold comparison.
+"""
+
+import hashlib
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from services.lru_cache import LRUCache
+
+DAYS_IN_CALENDAR = 366
+FEB29_SLOT = 59  # 0-based slot of Feb 29 in the 366-day calendar
+
+DEFAULT_PERCENTILE = 90.0
+DEFAULT_WINDOW_HALF_WIDTH = 5   # ±5 days -> 11-day window
+DEFAULT_SMOOTH_WIDTH = 31
+DEFAULT_MIN_DURATION = 5
+DEFAULT_MAX_GAP = 2
+
+# Climatologies kept in memory, keyed by (station, series hash, parameters)
+CLIMATOLOGY_CACHE_SIZE = int(os.getenv("SST_CLIMATOLOGY_CACHE_SIZE", "512"))
+
+# Upper bound on elements in the per-block window array (stations x 366 x years x window)
+CLIMATOLOGY_BLOCK_ELEMENTS = int(os.getenv("SST_CLIMATOLOGY_BLOCK_ELEMENTS", "5000000"))
+
+_climatology_cache = LRUCache(CLIMATOLOGY_CACHE_SIZE)
+_cache_stats = {"climatology_hits": 0, "climatology_misses": 0}
+
+
+def _calendar_array(df: pd.DataFrame):
+    """
+    Lay date,value[,station_id] rows onto a (station, year, 366) array.
+
+    Non-leap years get a synthetic Feb 29 (mean of Feb 28 and Mar 1) so that
+    consecutive slots are always consecutive days.
+
+    Returns:
+        (station_ids, years, values)
+    """
+    dates = pd.to_datetime(df["date"]).dt.normalize()
+    station_col = df["station_id"] if "station_id" in df.columns else pd.Series("default", index=df.index)
+    station_codes, station_ids = pd.factorize(station_col.astype(str), sort=True)
+
+    years_of_rows = dates.dt.year.to_numpy()
+    first_year = years_of_rows.min()
+    years = np.arange(first_year, years_of_rows.max() + 1)
+
+    day_of_year = dates.dt.dayofyear.to_numpy() - 1
+    is_leap_row = dates.dt.is_leap_year.to_numpy()
+    slots = np.where(~is_leap_row & (day_of_year >= FEB29_SLOT), day_of_year + 1, day_of_year)
+
+    values = np.full((len(station_ids), len(years), DAYS_IN_CALENDAR), np.nan)
+    values[station_codes, years_of_rows - first_year, slots] = df["value"].to_numpy(dtype=np.float64)
+
+    non_leap = ~_is_leap(years)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        values[:, non_leap, FEB29_SLOT] = np.nanmean(
+            values[:, non_leap][:, :, [FEB29_SLOT - 1, FEB29_SLOT + 1]], axis=-1
+        )
+
+    return list(station_ids), years, values
+
+
+def _is_leap(years: np.ndarray) -> np.ndarray:
+    return ((years % 4 == 0) & (years % 100 != 0)) | (years % 400 == 0)
+
+
+def _smooth_circular(a: np.ndarray, width: int) -> np.ndarray:
+    """NaN-aware circular moving average along the last (day-of-year) axis"""
+    if width <= 1:
+        return a
+    pad = width // 2
+    extended = np.concatenate([a[..., -pad:], a, a[..., :pad]], axis=-1)
+
+    valid = np.isfinite(extended)
+    sums = np.cumsum(np.where(valid, extended, 0.0), axis=-1)
+    counts = np.cumsum(valid, axis=-1)
+    sums = np.concatenate([np.zeros(a.shape[:-1] + (1,)), sums], axis=-1)
+    counts = np.concatenate([np.zeros(a.shape[:-1] + (1,)), counts], axis=-1)
+
+    window_sums = sums[..., width:] - sums[..., :-width]
+    window_counts = counts[..., width:] - counts[..., :-width]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return window_sums / window_counts
+
+
+def _compute_climatology(values: np.ndarray, percentile: float, window_half_width: int,
+                         smooth_width: int):
+    """
+    Climatology mean and threshold for a block of stations.
+
+    Args:
+        values: (stations, years, 366) calendar array
+
+    Returns:
+        (clim, thresh), each of shape (stations, 366)
+    """
+    n_stations, n_years, _ = values.shape
+    width = 2 * window_half_width + 1
+
+    flat = values.reshape(n_stations, n_years * DAYS_IN_CALENDAR)
+    padded = np.pad(flat, ((0, 0), (window_half_width, window_half_width)), constant_values=np.nan)
+
+    # (stations, years*366, window) view -> (stations, 366, years*window)
+    windows = sliding_window_view(padded, width, axis=1)
+    windows = windows.reshape(n_stations, n_years, DAYS_IN_CALENDAR, width)
+    samples = windows.transpose(0, 2, 1, 3).reshape(n_stations, DAYS_IN_CALENDAR, n_years * width)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        clim = np.nanmean(samples, axis=-1)
+        thresh = np.nanpercentile(samples, percentile, axis=-1)
+
+    return _smooth_circular(clim, smooth_width), _smooth_circular(thresh, smooth_width)
+
+
+def _station_key(station_id: str, station_values: np.ndarray, first_year: int, params: tuple) -> tuple:
+    digest = hashlib.sha1(np.ascontiguousarray(station_values).tobytes()).hexdigest()
+    return (station_id, first_year, digest, params)
+
+
+def get_climatologies(station_ids, years, values, percentile: float = DEFAULT_PERCENTILE,
+                      window_half_width: int = DEFAULT_WINDOW_HALF_WIDTH,
+                      smooth_width: int = DEFAULT_SMOOTH_WIDTH,
+                      baseline=None):
+    """
+    Climatology and threshold for every station, using the per-station cache.
+
+    Args:
+        baseline: Optional (first_year, last_year) climatology period
+
+    Returns:
+        (clim, thresh), each of shape (stations, 366)
+    """
+    baseline_values = values
+    if baseline is not None:
+        in_baseline = (years >= baseline[0]) & (years <= baseline[1])
+        baseline_values = np.where(in_baseline[None, :, None], values, np.nan)
+
+    params = (float(percentile), int(window_half_width), int(smooth_width),
+              tuple(baseline) if baseline is not None else None)
+
+    clim = np.empty((len(station_ids), DAYS_IN_CALENDAR))
+    thresh = np.empty((len(station_ids), DAYS_IN_CALENDAR))
+    keys = [_station_key(sid, baseline_values[i], int(years[0]), params) for i, sid in enumerate(station_ids)]
+
+    missing = []
+    for i, cached in enumerate(_climatology_cache.get_many(keys)):
+        if cached is None:
+            missing.append(i)
+        else:
+            clim[i], thresh[i] = cached
+    _cache_stats["climatology_hits"] += len(keys) - len(missing)
+    _cache_stats["climatology_misses"] += len(missing)
+
+    if missing:
+        per_station = len(years) * DAYS_IN_CALENDAR * (2 * window_half_width + 1)
+        block = max(1, CLIMATOLOGY_BLOCK_ELEMENTS // per_station)
+        missing = np.asarray(missing)
+
+        for start in range(0, len(missing), block):
+            rows = missing[start:start + block]
+            block_clim, block_thresh = _compute_climatology(
+                baseline_values[rows], percentile, window_half_width, smooth_width
+            )
+            clim[rows], thresh[rows] = block_clim, block_thresh
+
+        _climatology_cache.put_many((keys[i], (clim[i].copy(), thresh[i].copy())) for i in missing)
+
+    return clim, thresh
+
+
+def _slot_dates(years: np.ndarray):
+    """
+    Calendar dates for every (year, slot), flattened to years*366.
+    The synthetic Feb 29 of non-leap years maps to Mar 1 as an event start
+    and to Feb 28 as an event end.
+    """
+    jan1 = np.array([f"{int(y)}-01-01" for y in years], dtype="datetime64[D]")
+    leap = _is_leap(years)
+    slots = np.arange(DAYS_IN_CALENDAR)
+
+    shift_after = (~leap[:, None]) & (slots[None, :] > FEB29_SLOT)
+    placeholder = (~leap[:, None]) & (slots[None, :] == FEB29_SLOT)
+
+    start_offsets = slots[None, :] - shift_after
+    end_offsets = start_offsets - placeholder
+
+    start_dates = (jan1[:, None] + start_offsets).ravel()
+    end_dates = (jan1[:, None] + end_offsets).ravel()
+    return start_dates, end_dates
+
+
+def detect_events(values: np.ndarray, clim: np.ndarray, thresh: np.ndarray, years: np.ndarray,
+                  min_duration: int = DEFAULT_MIN_DURATION, max_gap: int = DEFAULT_MAX_GAP):
+    """
+    Detect and merge threshold exceedance runs for all stations at once.
+
+    The synthetic Feb 29 of non-leap years is not a real day: it never
+    counts toward durations, gaps or intensities, and only bridges a run
+    when both Feb 28 and Mar 1 exceed the threshold.
+
+    Args:
+        values: (stations, years, 366) calendar array
+        clim, thresh: (stations, 366)
+        years: Calendar year of each row of `values`
+
+    Returns:
+        dict of 1-D arrays (one entry per event): station, start, end (flat
+        slot indices), intensity_max, intensity_mean, intensity_cumulative
+    """
+    n_stations, n_years, _ = values.shape
+    n_slots = n_years * DAYS_IN_CALENDAR
+    flat = values.reshape(n_stations, n_slots)
+    clim_flat = np.tile(clim, (1, n_years))
+    thresh_flat = np.tile(thresh, (1, n_years))
+
+    placeholder = ((~_is_leap(years))[:, None] & (np.arange(DAYS_IN_CALENDAR) == FEB29_SLOT)).ravel()
+    # Real-day ordinal of each slot (a placeholder shares Feb 28's)
+    day_ordinal = np.cumsum(~placeholder) - 1
+
+    with np.errstate(invalid="ignore"):
+        exceed = flat > thresh_flat
+    exceed[:, placeholder] = False
+    bridge = np.flatnonzero(placeholder)
+    bridge = bridge[(bridge > 0) & (bridge < n_slots - 1)]
+    exceed[:, bridge] = exceed[:, bridge - 1] & exceed[:, bridge + 1]
+
+    anomaly = flat - clim_flat
+    anomaly[:, placeholder] = np.nan
+
+    # Run boundaries from the padded exceedance mask (row-major, so starts/ends pair up)
+    padded = np.zeros((n_stations, n_slots + 2), dtype=np.int8)
+    padded[:, 1:-1] = exceed
+    edges = np.diff(padded, axis=1)
+    station, starts = np.nonzero(edges == 1)
+    _, ends = np.nonzero(edges == -1)
+    ends = ends - 1
+
+    long_enough = (day_ordinal[ends] - day_ordinal[starts] + 1) >= min_duration
+    station, starts, ends = station[long_enough], starts[long_enough], ends[long_enough]
+
+    # Merge events of the same station separated by <= max_gap days
+    if len(starts):
+        gaps = day_ordinal[starts[1:]] - day_ordinal[ends[:-1]] - 1
+        joins = (station[1:] == station[:-1]) & (gaps <= max_gap)
+        first = np.flatnonzero(np.r_[True, ~joins])
+        last = np.r_[first[1:] - 1, len(starts) - 1]
+        station, starts, ends = station[first], starts[first], ends[last]
+
+    # Segment statistics over the flattened anomaly array
+    anomaly_flat = anomaly.ravel()
+    valid = np.isfinite(anomaly_flat)
+    seg_start = station * n_slots + starts
+    seg_stop = station * n_slots + ends + 1
+
+    cumulative = np.concatenate([[0.0], np.cumsum(np.where(valid, anomaly_flat, 0.0))])
+    valid_days = np.concatenate([[0], np.cumsum(valid)])
+    sums = cumulative[seg_stop] - cumulative[seg_start]
+    counts = valid_days[seg_stop] - valid_days[seg_start]
+
+    if len(starts):
+        maxima_source = np.append(np.where(valid, anomaly_flat, -np.inf), -np.inf)
+        bounds = np.empty(2 * len(starts), dtype=np.intp)
+        bounds[0::2], bounds[1::2] = seg_start, seg_stop
+        maxima = np.maximum.reduceat(maxima_source, bounds)[0::2]
+    else:
+        maxima = np.empty(0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = sums / counts
+
+    return {
+        "station": station,
+        "start": starts,
+        "end": ends,
+        "intensity_max": maxima,
+        "intensity_mean": means,
+        "intensity_cumulative": sums,
+    }
+
+
+def detect_marine_heatwaves(df: pd.DataFrame, percentile: float = DEFAULT_PERCENTILE,
+                            min_duration: int = DEFAULT_MIN_DURATION,
+                            max_gap: int = DEFAULT_MAX_GAP,
+                            window_half_width: int = DEFAULT_WINDOW_HALF_WIDTH,
+                            smooth_width: int = DEFAULT_SMOOTH_WIDTH,
+                            baseline=None) -> dict:
+    """
+    Detect marine heatwaves in daily SST series.
+
+    Input columns:
+    date,value (optional: station_id for many stations in one call)
+
+    Returns:
+        {"stations": {station_id: {"n_events": int, "events": [...]}, ...},
+         "parameters": {...}}
+    """
+    if min_duration < 1 or max_gap < 0:
+        raise ValueError("min_duration must be >= 1 and max_gap must be >= 0")
+
+    station_ids, years, values = _calendar_array(df)
+    clim, thresh = get_climatologies(
+        station_ids, years, values, percentile, window_half_width, smooth_width, baseline
+    )
+    events = detect_events(values, clim, thresh, years, min_duration, max_gap)
+
+    start_dates, end_dates = _slot_dates(years)
+    event_starts = start_dates[events["start"]]
+    event_ends = end_dates[events["end"]]
+
+    table = pd.DataFrame({
+        "station_id": np.asarray(station_ids, dtype=object)[events["station"]],
+        "start_date": pd.to_datetime(event_starts).strftime("%Y-%m-%d"),
+        "end_date": pd.to_datetime(event_ends).strftime("%Y-%m-%d"),
+        "duration_days": (event_ends - event_starts).astype(np.int64) + 1,
+        "intensity_max": np.round(events["intensity_max"], 4),
+        "intensity_mean": np.round(events["intensity_mean"], 4),
+        "intensity_cumulative": np.round(events["intensity_cumulative"], 4),
+    })
+
+    stations = {sid: {"n_events": 0, "events": []} for sid in station_ids}
+    for sid, group in table.groupby("station_id", sort=False):
+        records = group.drop(columns="station_id").to_dict(orient="records")
+        stations[sid] = {"n_events": len(records), "events": records}
+
+    return {
+        "stations": stations,
+        "parameters": {
+            "percentile": percentile,
+            "min_duration": min_duration,
+            "max_gap": max_gap,
+            "window_half_width": window_half_width,
+            "smooth_width": smooth_width,
+            "baseline": list(baseline) if baseline is not None else None,
+        },
+    }
+
+
+def get_heatwave_cache_stats() -> dict:
+    return {**_cache_stats, "climatologies_in_memory": len(_climatology_cache)}
@@ -1,12 +1,54 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
 import pandas as pd
-from prophet import Prophet
 
-def forecast_sst_from_csv(df: pd.DataFrame, periods: int = 30):
-    """
-    Input CSV columns:
-    date,value
-    """
+from services.lru_cache import LRUCache
+from services.sst_numpy import forecast_harmonic
+
+# prophet/cmdstanpy are imported lazily: they dominate import time and are
+# not needed when the NumPy "harmonic" engine is selected.
+
+# Forecasting engines: "prophet" (default) or "harmonic" (pure NumPy, sub-ms)
+SST_ENGINES = ("prophet", "harmonic")
+
+# Fitted Prophet models kept in memory, keyed by series fingerprint
+SST_MODEL_CACHE_SIZE = int(os.getenv("SST_MODEL_CACHE_SIZE", "32"))
+
+# Finished forecasts kept in memory, keyed by (fingerprint, periods)
+SST_FORECAST_CACHE_SIZE = int(os.getenv("SST_FORECAST_CACHE_SIZE", "128"))
+
+# Optional on-disk tier of serialized fitted models (unset = memory only)
+SST_MODEL_CACHE_DIR = os.getenv("SST_MODEL_CACHE_DIR")
+
+# Worker processes for multi-station forecasting (0 = one per CPU core)
+SST_POOL_WORKERS = int(os.getenv("SST_POOL_WORKERS", "0")) or os.cpu_count() or 1
+
+# Optional on-disk store of per-station warm-start parameters (unset = memory only)
+SST_WARM_START_DIR = os.getenv("SST_WARM_START_DIR")
+
+# Bump when the Prophet fit configuration changes to invalidate old entries
+FIT_CONFIG_VERSION = "prophet-default-v1"
+
+
+_model_cache = LRUCache(SST_MODEL_CACHE_SIZE)
+_forecast_cache = LRUCache(SST_FORECAST_CACHE_SIZE)
+_cache_stats = {"model_memory_hits": 0, "model_disk_hits": 0, "model_fits": 0,
+                "warm_start_fits": 0, "forecast_hits": 0, "forecast_misses": 0}
 
+# station_id -> last fitted Stan parameters (see extract_warm_start_params)
+_warm_start_params = {}
+_warm_start_lock = threading.Lock()
+
+
+def _clean_series(df: pd.DataFrame) -> pd.DataFrame:
+    """date,value frame -> sorted, de-duplicated Prophet (ds, y) frame"""
     # Rename for Prophet
     prophet_df = df.rename(columns={
         "date": "ds",
@@ -20,10 +62,256 @@ def forecast_sst_from_csv(df: pd.DataFrame, periods: int = 30):
     # 🔥 IMPORTANT FIX
     prophet_df = prophet_df.drop_duplicates(subset="ds")
 
+    return prophet_df[["ds", "y"]].reset_index(drop=True)
+
+
+def series_fingerprint(prophet_df: pd.DataFrame) -> str:
+    """Stable hash of a cleaned (ds, y) series plus the fit configuration"""
+    digest = hashlib.sha256(FIT_CONFIG_VERSION.encode())
+    digest.update(prophet_df["ds"].to_numpy(dtype="datetime64[ns]").view(np.int64).tobytes())
+    digest.update(prophet_df["y"].to_numpy(dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+def _disk_path(fingerprint: str) -> str:
+    return os.path.join(SST_MODEL_CACHE_DIR, f"{fingerprint}.json")
+
+
+def _load_from_disk(fingerprint: str):
+    if not SST_MODEL_CACHE_DIR:
+        return None
+    path = _disk_path(fingerprint)
+    if not os.path.exists(path):
+        return None
+    from prophet.serialize import model_from_json
+    try:
+        with open(path, "r") as f:
+            return model_from_json(f.read())
+    except Exception as e:
+        print(f"⚠️ Could not load cached SST model {path}: {e}")
+        return None
+
+
+def _save_to_disk(fingerprint: str, model: "Prophet"):
+    if not SST_MODEL_CACHE_DIR:
+        return
+    from prophet.serialize import model_to_json
+    try:
+        os.makedirs(SST_MODEL_CACHE_DIR, exist_ok=True)
+        path = _disk_path(fingerprint)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(model_to_json(model))
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"⚠️ Could not persist SST model: {e}")
+
+
+# -----------------------------
+# Warm-start parameter store
+# -----------------------------
+def extract_warm_start_params(model: "Prophet") -> dict:
+    """Fitted Stan parameters of a MAP-fitted model, usable as init for the next fit"""
+    params = {}
+    for name in ["k", "m", "sigma_obs"]:
+        params[name] = float(model.params[name][0][0])
+    for name in ["delta", "beta"]:
+        params[name] = np.asarray(model.params[name][0], dtype=np.float64)
+    return params
+
+
+def _warm_start_path(station_id: str) -> str:
+    key = hashlib.sha1(str(station_id).encode()).hexdigest()
+    return os.path.join(SST_WARM_START_DIR, f"{key}.json")
+
+
+def get_warm_start_params(station_id: str):
+    """Last fitted parameters for a station (memory, then disk), or None"""
+    with _warm_start_lock:
+        params = _warm_start_params.get(station_id)
+    if params is not None or not SST_WARM_START_DIR:
+        return params
+
+    path = _warm_start_path(station_id)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r") as f:
+            stored = json.load(f)
+    except Exception as e:
+        print(f"⚠️ Could not load warm-start params {path}: {e}")
+        return None
+
+    params = {name: stored[name] for name in ["k", "m", "sigma_obs"]}
+    params.update({name: np.asarray(stored[name], dtype=np.float64) for name in ["delta", "beta"]})
+    with _warm_start_lock:
+        _warm_start_params[station_id] = params
+    return params
+
+
+def save_warm_start_params(station_id: str, params: dict):
+    with _warm_start_lock:
+        _warm_start_params[station_id] = params
+    if not SST_WARM_START_DIR:
+        return
+    try:
+        os.makedirs(SST_WARM_START_DIR, exist_ok=True)
+        path = _warm_start_path(station_id)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        serializable = {
+            name: value.tolist() if isinstance(value, np.ndarray) else value
+            for name, value in params.items()
+        }
+        with open(tmp_path, "w") as f:
+            json.dump(serializable, f)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"⚠️ Could not persist warm-start params: {e}")
+
+
+def get_fitted_model(prophet_df: pd.DataFrame, fingerprint: str = None,
+                     init_params: dict = None) -> "Prophet":
+    """
+    Return a fitted Prophet model for the series, fitting only on a cache miss.
+    Lookup order: memory LRU -> on-disk tier -> fresh fit.
+
+    init_params (from a previous fit of the same station) seed the Stan
+    optimizer, so append-only updates converge in a few iterations.
+    Prophet falls back to its default init for any parameter whose shape
+    no longer matches.
+    """
+    model, source = _lookup_or_fit(prophet_df, fingerprint or series_fingerprint(prophet_df), init_params)
+    _count_model_source(source)
+    return model
+
+
+def _lookup_or_fit(prophet_df: pd.DataFrame, fingerprint: str, init_params: dict = None):
+    """
+    get_fitted_model without the counters.
+
+    Returns:
+        (model, source) with source "memory", "disk", "fit" or "warm_start_fit"
+    """
+    model = _model_cache.get(fingerprint)
+    if model is not None:
+        return model, "memory"
+
+    model = _load_from_disk(fingerprint)
+    if model is not None:
+        _model_cache.put(fingerprint, model)
+        return model, "disk"
+
+    from prophet import Prophet
+
     # Train Prophet
     model = Prophet()
-    model.fit(prophet_df)
+    if init_params is not None:
+        model.fit(prophet_df, init=init_params)
+        source = "warm_start_fit"
+    else:
+        model.fit(prophet_df)
+        source = "fit"
+
+    _model_cache.put(fingerprint, model)
+    _save_to_disk(fingerprint, model)
+    return model, source
+
+
+def _count_model_source(source: str):
+    if source == "memory":
+        _cache_stats["model_memory_hits"] += 1
+    elif source == "disk":
+        _cache_stats["model_disk_hits"] += 1
+    elif source is not None:
+        _cache_stats["model_fits"] += 1
+        if source == "warm_start_fit":
+            _cache_stats["warm_start_fits"] += 1
+
+
+def forecast_sst_from_csv(df: pd.DataFrame, periods: int = 30, station_id: str = None,
+                          engine: str = "prophet"):
+    """
+    Input CSV columns:
+    date,value
+
+    Fitted models are cached by series fingerprint, so re-uploading the same
+    history skips the Prophet fit; a new horizon only re-runs predict.
+
+    With station_id set, the fit is warm-started from that station's last
+    fitted parameters and the new parameters are stored for next time (also
+    on a forecast cache hit, from the parameters cached with the forecast).
+
+    engine="harmonic" uses the NumPy trend + annual-harmonics model instead
+    of Prophet (same output schema, no caching or warm start needed).
+    """
+    if engine not in SST_ENGINES:
+        raise ValueError(f"Unknown SST engine '{engine}'. Choose one of: {list(SST_ENGINES)}")
+
+    prophet_df = _clean_series(df)
+    if engine == "harmonic":
+        return _harmonic_forecast(prophet_df, periods)
+
+    fingerprint = series_fingerprint(prophet_df)
+
+    cached = _lookup_forecast(fingerprint, periods)
+    if cached is not None:
+        response, params = cached
+    else:
+        init_params = get_warm_start_params(station_id) if station_id is not None else None
+        response, params = _fit_and_forecast(prophet_df, fingerprint, periods, init_params)
+        _forecast_cache.put((fingerprint, periods), (response, params))
+
+    if station_id is not None:
+        save_warm_start_params(station_id, params)
+    return response
+
+
+def _harmonic_forecast(prophet_df: pd.DataFrame, periods: int) -> dict:
+    result = forecast_harmonic(prophet_df, periods=periods, freq="ME")
+    return {
+        "forecast": result.to_dict(orient="records")
+    }
+
+
+def _lookup_forecast(fingerprint: str, periods: int):
+    """(response, fitted parameters) cached for this series and horizon, or None"""
+    cached = _forecast_cache.get((fingerprint, periods))
+    if cached is not None:
+        _cache_stats["forecast_hits"] += 1
+    else:
+        _cache_stats["forecast_misses"] += 1
+    return cached
+
+
+def _fit_and_forecast(prophet_df: pd.DataFrame, fingerprint: str, periods: int,
+                      init_params: dict = None):
+    """Forecast plus the fitted parameters, which are cached with it for warm starts"""
+    model = get_fitted_model(prophet_df, fingerprint, init_params)
+    return _forecast_with_model(model, periods), extract_warm_start_params(model)
+
+
+def _forecast_in_worker(prophet_df: pd.DataFrame, fingerprint: str, periods: int,
+                        init_params: dict = None, model_json: str = None):
+    """
+    Process pool task for one station.
+
+    Worker processes have their own caches, so the fitted model is sent
+    back as JSON for the parent to cache and count. A model the parent
+    already holds is passed in as model_json and only predicted.
+
+    Returns:
+        (response, model_json or None, source or None)
+    """
+    from prophet.serialize import model_from_json, model_to_json
 
+    if model_json is not None:
+        return _forecast_with_model(model_from_json(model_json), periods), None, None
+
+    model, source = _lookup_or_fit(prophet_df, fingerprint, init_params)
+    return _forecast_with_model(model, periods), model_to_json(model), source
+
+
+def _forecast_with_model(model: "Prophet", periods: int) -> dict:
     # Future forecast
     future = model.make_future_dataframe(periods=periods, freq="ME")
     forecast = model.predict(future)
@@ -33,4 +321,167 @@ def forecast_sst_from_csv(df: pd.DataFrame, periods: int = 30):
 
     return {
         "forecast": result.to_dict(orient="records")
-    }
\ No newline at end of file
+    }
+
+
+# -----------------------------
+# Multi-station forecasting
+# -----------------------------
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """
+    Lazily create the shared process pool.
+    Prophet/cmdstanpy fits are CPU-bound and single-threaded, so separate
+    processes are the only way to use more than one core. "spawn" avoids
+    forking a server process that already runs threads.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=SST_POOL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def _reset_pool(broken: ProcessPoolExecutor):
+    """Drop a pool whose worker died, so the next request starts a fresh one"""
+    global _pool
+    with _pool_lock:
+        if _pool is broken:
+            _pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def _submit(pool: ProcessPoolExecutor, *args):
+    """Submit a station task, replacing the pool once if it is broken"""
+    try:
+        return pool, pool.submit(_forecast_in_worker, *args)
+    except BrokenProcessPool:
+        _reset_pool(pool)
+        pool = _get_pool()
+        return pool, pool.submit(_forecast_in_worker, *args)
+
+
+def iter_station_forecasts(df: pd.DataFrame, periods: int = 30, warm_start: bool = False,
+                           engine: str = "prophet"):
+    """
+    Forecast every station in a date,value,station_id frame in parallel.
+
+    Cached stations are yielded immediately; the rest are fitted in the
+    process pool and yielded as each one completes. Fitted models come back
+    to this (parent) process and go into its model cache, so a later
+    request with a new horizon only re-runs predict. With warm_start=True
+    each station's fit starts from its stored parameters, and the
+    refreshed parameters are saved here too.
+
+    If a worker dies, its stations report an error and the pool is
+    replaced for later requests.
+
+    The "harmonic" engine is cheap enough to run inline, without the pool.
+
+    Yields:
+        (station_id, result) where result is {"forecast": [...]} or {"error": str}
+    """
+    if engine not in SST_ENGINES:
+        raise ValueError(f"Unknown SST engine '{engine}'. Choose one of: {list(SST_ENGINES)}")
+
+    if engine == "harmonic":
+        for station_id, station_df in df.groupby("station_id", sort=False):
+            try:
+                prophet_df = _clean_series(station_df[["date", "value"]])
+                yield station_id, _harmonic_forecast(prophet_df, periods)
+            except Exception as e:
+                yield station_id, {"error": f"Forecast failed: {str(e)}"}
+        return
+
+    from prophet.serialize import model_from_json, model_to_json
+
+    pool = _get_pool()
+    futures = {}
+    fitted_params = {}  # fingerprint -> parameters of models sent from the parent cache
+
+    for station_id, station_df in df.groupby("station_id", sort=False):
+        try:
+            prophet_df = _clean_series(station_df[["date", "value"]])
+            fingerprint = series_fingerprint(prophet_df)
+        except Exception as e:
+            yield station_id, {"error": f"Invalid series: {str(e)}"}
+            continue
+
+        cached = _lookup_forecast(fingerprint, periods)
+        if cached is not None:
+            response, params = cached
+            if warm_start:
+                save_warm_start_params(str(station_id), params)
+            yield station_id, response
+            continue
+
+        model = _model_cache.get(fingerprint)
+        try:
+            if model is not None:
+                _count_model_source("memory")
+                fitted_params[fingerprint] = extract_warm_start_params(model)
+                pool, future = _submit(pool, prophet_df, fingerprint, periods, None, model_to_json(model))
+            else:
+                init_params = get_warm_start_params(str(station_id)) if warm_start else None
+                pool, future = _submit(pool, prophet_df, fingerprint, periods, init_params)
+        except Exception as e:
+            yield station_id, {"error": f"Forecast failed: {str(e)}"}
+            continue
+        futures[future] = (station_id, fingerprint)
+
+    for future in as_completed(futures):
+        station_id, fingerprint = futures[future]
+        try:
+            result, model_json, source = future.result()
+        except BrokenProcessPool as e:
+            _reset_pool(pool)
+            yield station_id, {"error": f"Forecast worker crashed: {str(e)}"}
+            continue
+        except Exception as e:
+            yield station_id, {"error": f"Forecast failed: {str(e)}"}
+            continue
+
+        if model_json is not None:
+            model = model_from_json(model_json)
+            _model_cache.put(fingerprint, model)
+            _count_model_source(source)
+        params = fitted_params[fingerprint] if model_json is None else extract_warm_start_params(model)
+        if warm_start:
+            save_warm_start_params(str(station_id), params)
+
+        _forecast_cache.put((fingerprint, periods), (result, params))
+        yield station_id, result
+
+
+def forecast_sst_multi_station(df: pd.DataFrame, periods: int = 30, warm_start: bool = False,
+                               engine: str = "prophet") -> dict:
+    """
+    Input CSV columns:
+    date,value,station_id
+
+    Returns:
+        {"stations": {station_id: {"forecast": [...]}, ...}}
+    """
+    return {
+        "stations": {
+            str(station_id): result
+            for station_id, result in iter_station_forecasts(df, periods, warm_start, engine)
+        }
+    }
+
+
+def get_sst_cache_stats() -> dict:
+    """Monitoring counters for the SST model/forecast caches"""
+    return {
+        **_cache_stats,
+        "models_in_memory": len(_model_cache),
+        "warm_start_stations": len(_warm_start_params),
+        "forecasts_in_memory": len(_forecast_cache),
+        "disk_tier": SST_MODEL_CACHE_DIR or None,
+    }
@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Add backend root to sys.path so tests can import 'services'
+backend_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if backend_root not in sys.path:
+    sys.path.append(backend_root)
@@ -0,0 +1,77 @@
+"""
+Agreement of every fish classifier inference backend with eager PyTorch.
+
+Uses a randomly initialised EfficientNet-B0 (the trained weights are not in
+the repository), so this checks the backend conversions themselves.
+"""
+
+import pytest
+
+torch = pytest.importorskip("torch")
+timm = pytest.importorskip("timm")
+pytest.importorskip("torchvision")
+
+from services import fish_classifier as fc
+
+NUM_CLASSES = 9
+MIN_TOP1_AGREEMENT = 0.95
+
+
+@pytest.fixture(scope="module")
+def eager():
+    torch.manual_seed(0)
+    model = timm.create_model("efficientnet_b0", pretrained=False, num_classes=NUM_CLASSES)
+    # Spread the head weights so random inputs give well-separated classes
+    torch.nn.init.normal_(model.classifier.weight, std=0.5)
+    # Calibrate the BatchNorm running statistics; with the default (0, 1)
+    # statistics the pooled features shrink towards zero and int8 rounds
+    # every logit to 0
+    model.train()
+    with torch.no_grad():
+        for _ in range(3):
+            model(torch.randn(16, 3, fc.INPUT_SIZE, fc.INPUT_SIZE))
+    return model.eval()
+
+
+@pytest.fixture(scope="module")
+def images():
+    torch.manual_seed(1)
+    return torch.randn(32, 3, fc.INPUT_SIZE, fc.INPUT_SIZE)
+
+
+def _logits(model, images):
+    with torch.no_grad():
+        return model(images)
+
+
+def _check_agreement(candidate, eager, images, rel_tol):
+    reference = _logits(eager, images)
+    logits = _logits(candidate, images)
+    assert logits.shape == reference.shape
+    top1 = (logits.argmax(1) == reference.argmax(1)).float().mean().item()
+    assert top1 >= MIN_TOP1_AGREEMENT, f"top-1 agreement with eager {top1:.1%}"
+    max_diff = (logits - reference).abs().max().item()
+    assert max_diff <= rel_tol * reference.std().item(), f"max |logit diff| {max_diff:.2e}"
+
+
+def test_torchscript_matches_eager(eager, images):
+    scripted = fc.build_inference_model(eager, "torchscript", torch.device("cpu"))
+    _check_agreement(scripted, eager, images, rel_tol=1e-3)
+
+
+def test_int8_matches_eager(eager, images):
+    quantized = fc.build_inference_model(eager, "int8", torch.device("cpu"))
+    _check_agreement(quantized, eager, images, rel_tol=0.1)
+
+
+def test_onnx_matches_eager(eager, images, tmp_path, monkeypatch):
+    pytest.importorskip("onnx")
+    pytest.importorskip("onnxruntime")
+    monkeypatch.setattr(fc, "FISH_ONNX_PATH", str(tmp_path / "fish_classifier.onnx"))
+    session = fc.build_inference_model(eager, "onnx", torch.device("cpu"))
+    _check_agreement(session, eager, images, rel_tol=1e-3)
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        fc.load_model_and_labels(backend="tensorrt")
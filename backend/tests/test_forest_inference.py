@@ -0,0 +1,94 @@
+"""
+Parity of the array-backed FlatForest engine with sklearn's predict,
+including rows with missing (NaN) features and every chunking path.
+"""
+
+import warnings
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestRegressor
+
+from services.forest_inference import FlatForest
+
+# sklearn warns on every call when fed arrays without feature names
+warnings.filterwarnings("ignore", category=UserWarning)
+
+
+def random_inputs(n_rows: int, seed: int = 0, missing: float = 0.1) -> np.ndarray:
+    """depth/salinity/ph rows in realistic ranges, a fraction of cells blank (NaN)"""
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([
+        rng.uniform(0, 200, n_rows),    # depth (m)
+        rng.uniform(30, 38, n_rows),    # salinity (PSU)
+        rng.uniform(7.6, 8.4, n_rows),  # pH
+    ])
+    X[rng.random(X.shape) < missing] = np.nan
+    return X
+
+
+@pytest.fixture(scope="module")
+def forest():
+    """Small forest trained with missing values, so splits learn both NaN directions"""
+    X = random_inputs(2000, seed=1)
+    y = np.nan_to_num(X[:, 0] / 50 + np.sin(X[:, 1]) - X[:, 2], nan=3.0)
+    return RandomForestRegressor(n_estimators=25, max_depth=8, random_state=0).fit(X, y)
+
+
+@pytest.mark.parametrize("block_rows", [1, 7, 128, 2048])
+def test_flat_forest_matches_sklearn(forest, block_rows):
+    flat = FlatForest.from_sklearn(forest)
+    X = random_inputs(1000, seed=2)
+    np.testing.assert_allclose(flat.predict(X, block_rows=block_rows), forest.predict(X), rtol=1e-9, atol=1e-12)
+
+
+def test_missing_values_follow_learned_direction(forest):
+    flat = FlatForest.from_sklearn(forest)
+    assert flat.missing_go_to_left.any() and not flat.missing_go_to_left.all()
+
+    X = random_inputs(200, seed=3, missing=0.0)
+    X[:, 1] = np.nan
+    np.testing.assert_allclose(flat.predict(X), forest.predict(X), rtol=1e-9, atol=1e-12)
+
+
+def test_predict_one_and_leaf_values(forest):
+    flat = FlatForest.from_sklearn(forest)
+    X = random_inputs(50, seed=4)
+    assert flat.predict_one(X[0]) == pytest.approx(forest.predict(X[:1])[0], rel=1e-9)
+    np.testing.assert_allclose(flat.leaf_values(forest.apply(X)), flat.predict_per_tree(X), rtol=1e-12)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 64, 128, 129, 50000])
+def test_chlorophyll_batch_matches_model_for_every_chunk_size(chunk_size):
+    """Chunks of FLAT_ENGINE_MAX_ROWS or fewer use FlatForest, larger ones sklearn"""
+    predict = pytest.importorskip("services.predict")
+    X = random_inputs(500, seed=5)
+    np.testing.assert_allclose(
+        predict.predict_chlorophyll_batch(X, chunk_size=chunk_size, use_cache=False),
+        predict.model.predict(X),
+        rtol=1e-9, atol=1e-12,
+    )
+
+
+@pytest.mark.parametrize("chunk_size", [0, -5])
+def test_chlorophyll_batch_rejects_non_positive_chunk_size(chunk_size):
+    predict = pytest.importorskip("services.predict")
+    with pytest.raises(ValueError):
+        predict.predict_chlorophyll_batch(random_inputs(10, seed=4), chunk_size=chunk_size)
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("10, 50,90", [10.0, 50.0, 90.0]),
+    ("", [5.0, 95.0]),
+    ("5,abc", [5.0, 95.0]),
+    ("5,150", [5.0, 95.0]),
+])
+def test_uncertainty_percentiles_fall_back_to_defaults(raw, expected):
+    predict = pytest.importorskip("services.predict")
+    assert predict._parse_percentiles(raw) == expected
+
+
+def test_uncertainty_rejects_non_positive_chunk_size():
+    predict = pytest.importorskip("services.predict")
+    with pytest.raises(ValueError):
+        predict.predict_chlorophyll_uncertainty(random_inputs(10, seed=4), chunk_size=0)